@@ -1,12 +1,26 @@
+import time
+from threading import Thread
+
 from pogodata import PogoData
+from pogodata.errors import QueryException
 
 from flask import Flask, request, jsonify
 
-data = PogoData()
+RELOAD_INTERVAL = 60 * 60
+QUERY_CACHE_SIZE = 1024
+
+data = PogoData(query_cache_size=QUERY_CACHE_SIZE)
 app = Flask(__name__)
 app.config["JSON_SORT_KEYS"] = False
 
 
+def reload_loop():
+    # requests keep being answered by the old snapshot while the new one is built
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        data.reload()
+
+
 def _str_to_num(kwargs: dict):
     for k, v in kwargs.items():
         try:
@@ -46,6 +60,21 @@ ENDPOINTS = {
 }
 
 
+@app.errorhandler(QueryException)
+def bad_query(error):
+    # invalid arguments, limits or languages are the client's fault
+    return jsonify({"error": str(error)}), 400
+
+
+@app.route('/v1/search')
+def search_route():
+    args = request.args
+    objs = data.search(args.get("name", ""), language=args.get("language"), kind=args.get("kind"),
+                       limit=args.get("limit", 10))
+    objs = [o.get_full(language=args.get("language"), iconset=args.get("iconset")) for o in objs]
+    return jsonify(objs, )
+
+
 @app.route('/v1/<endpoint>', methods=['GET', 'POST'])
 def main_route(endpoint):
     args = handle_request(request)
@@ -53,9 +82,15 @@ def main_route(endpoint):
     if not details:
         return jsonify({"error": "what"})
 
+    # limit, offset and cursor are passed on, so only the requested page is serialized
     objs = details["get"](**args)
+    next_cursor = objs.next_cursor
     objs = [o.get_full(language=args.get("language"), iconset=args.get("iconset")) for o in objs]
-    return jsonify(objs, )
+    response = jsonify(objs, )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
 
 
+Thread(target=reload_loop, name="pogodata-reload-loop", daemon=True).start()
 app.run(port=4442)
@@ -0,0 +1,59 @@
+"""
+Compares calculating the CP of every level and IV combination of a Pokemon one at a time
+(the way Pokemon.calculate_cp does) with pogodata.cp's batch functions.
+
+    python -m benchmarks.cp
+"""
+import time
+
+from math import floor
+
+from pogodata.misc import CP_MULTIPLIERS
+from pogodata.cp import calculate_cp, calculate_hp, cp_multiplier, calculate_batch, calculate_grid, LEVELS, ALL_IVS
+
+# Mewtwo
+BASE_STATS = (300, 182, 214)
+
+
+def dict_cp(base_stats, level, ivs):
+    # calculate_cp before CP multipliers were stored in an array
+    multiplier = CP_MULTIPLIERS.get(level, 0.5)
+    attack = base_stats[0] + ivs[0]
+    defense = base_stats[1] + ivs[1]
+    stamina = base_stats[2] + ivs[2]
+    return floor((attack * defense**0.5 * stamina**0.5 * multiplier**2) / 10)
+
+
+def scalar_stats(base_stats, level, ivs):
+    # what the batch functions calculate, one function call at a time
+    hp = calculate_hp(base_stats, level, ivs)
+    multiplier = cp_multiplier(level)
+    stat_product = (base_stats[0] + ivs[0]) * (base_stats[1] + ivs[1]) * multiplier**2 * hp
+    return calculate_cp(base_stats, level, ivs), hp, stat_product
+
+
+def timed(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{name:<26}{round(time.perf_counter() - start, 3):>8}s")
+    return result
+
+
+def main():
+    combinations = [(level, ivs) for level in LEVELS for ivs in ALL_IVS]
+    print(f"{len(combinations)} level and IV combinations. The batch functions calculate CP, HP and stat products\n")
+
+    old = timed("scalar (dict lookup)", lambda: [dict_cp(BASE_STATS, l, i) for l, i in combinations])
+    scalar = timed("scalar (calculate_cp)", lambda: [calculate_cp(BASE_STATS, l, i) for l, i in combinations])
+    stats = timed("scalar (cp, hp, product)", lambda: [scalar_stats(BASE_STATS, l, i) for l, i in combinations])
+    batch = timed("calculate_batch", lambda: calculate_batch((BASE_STATS, l, i) for l, i in combinations))
+    grid = timed("calculate_grid", lambda: calculate_grid(BASE_STATS))
+
+    assert old == scalar == batch.cp.tolist() == grid.cp.tolist()
+    assert [s[1] for s in stats] == batch.hp.tolist() == grid.hp.tolist()
+    assert [s[2] for s in stats] == batch.stat_product.tolist() == grid.stat_product.tolist()
+    print("\nAll results are the same")
+
+
+if __name__ == "__main__":
+    main()
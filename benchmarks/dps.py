@@ -0,0 +1,97 @@
+"""
+Compares calculating the DPS, TDO and PvP stats of every moveset one row at a time with MovesetTable,
+in this process and in one process per CPU.
+
+    python -m benchmarks.dps --artifact data.bin
+    python -m benchmarks.dps --cache-dir cache --offline
+"""
+import argparse
+import time
+
+from math import floor
+
+from pogodata import PogoData
+from pogodata.cp import cp_multiplier
+from pogodata.dps import MovesetTable, STAB, WEATHER_BOOST, TARGET_DEFENSE, LEVEL, IVS
+
+
+def _divide(a, b):
+    return a / b if b else 0.0
+
+
+def row_stats(mon, fast, charged, boosted):
+    # everything MovesetTable calculates, for one moveset at a time
+    multiplier = cp_multiplier(LEVEL)
+    attack = (mon.base_stats[0] + IVS[0]) * multiplier
+    defense = (mon.base_stats[1] + IVS[1]) * multiplier
+    hp = max(10, floor((mon.base_stats[2] + IVS[2]) * multiplier))
+    own_types = {t.proto.id for t in mon.types}
+    incoming = 900 / defense
+
+    def boost(move):
+        stab = STAB if move.type.proto.id in own_types else 1
+        return stab * (WEATHER_BOOST if move.type.proto.id in boosted else 1), stab
+
+    fast_boost, fast_stab = boost(fast)
+    charged_boost, charged_stab = boost(charged)
+    fast_energy = fast.pve["energy_delta"]
+    fast_duration = fast.pve["duration"] / 1000
+    charged_energy = abs(charged.pve["energy_delta"])
+    charged_duration = charged.pve["duration"] / 1000
+    charged_window = charged.pve["window"]["start"] / 1000
+
+    fast_dps = _divide(floor(0.5 * fast.pve["power"] * fast_boost * attack / TARGET_DEFENSE) + 1, fast_duration)
+    charged_dps = _divide(floor(0.5 * charged.pve["power"] * charged_boost * attack / TARGET_DEFENSE) + 1,
+                          charged_duration)
+    fast_eps = _divide(fast_energy, fast_duration)
+    charged_eps = _divide(charged_energy, charged_duration)
+    if charged_energy >= 100:
+        charged_eps = _divide(charged_energy + 0.5 * fast_energy + 0.5 * incoming * charged_window, charged_duration)
+
+    if fast_dps > charged_dps or not fast_eps + charged_eps:
+        dps = fast_dps
+    else:
+        gained = 0.5 * charged_energy + 0.5 * fast_energy
+        dps = (fast_dps * charged_eps + charged_dps * fast_eps) / (charged_eps + fast_eps)
+        dps += (charged_dps - fast_dps) / (charged_eps + fast_eps) * (0.5 - gained / hp) * incoming
+
+    return (dps, dps * hp / incoming,
+            _divide(fast.pvp["power"] * fast_stab, fast.pvp["turns"]),
+            _divide(fast.pvp["energy_delta"], fast.pvp["turns"]),
+            _divide(charged.pvp["power"] * charged_stab, abs(charged.pvp["energy_delta"])))
+
+
+def timed(name, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{name:<26}{round(time.perf_counter() - start, 4):>8}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifact", help="Load data from this artifact instead of building it")
+    parser.add_argument("--cache-dir", help="Directory downloads are cached in")
+    parser.add_argument("--offline", action="store_true", help="Only use downloads from --cache-dir")
+    args = parser.parse_args()
+
+    data = PogoData(cache_dir=args.cache_dir, offline=args.offline, artifact=args.artifact)
+    weather = data.weather[0] if data.weather else None
+    boosted = {t.proto.id for t in weather.boosts} if weather else set()
+
+    table = timed("MovesetTable", lambda: MovesetTable(data.mons, weather))
+    print(f"{len(table)} movesets of {len(data.mons)} Pokemon\n")
+    rows = timed("one row at a time", lambda: [
+        row_stats(mon, fast, charged, boosted) for mon, fast, charged in zip(table.mons, table.fast, table.charged)
+    ])
+
+    parallel = timed("MovesetTable, all CPUs", lambda: MovesetTable(data.mons, weather, max_workers=None))
+
+    assert rows == list(zip(table.dps, table.tdo, table.dpt, table.ept, table.dpe))
+    for name in ("dps", "tdo", "dpt", "ept", "dpe"):
+        assert getattr(parallel, name) == getattr(table, name)
+    print("\nAll results are the same")
+
+
+if __name__ == "__main__":
+    main()
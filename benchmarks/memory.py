@@ -0,0 +1,78 @@
+"""
+Reports how many bytes the objects of every category take up in a fully built snapshot.
+
+Everything reachable from an object counts towards it, but every object is only counted once:
+types are measured first, so e.g. the Type objects a Move points to count towards types, not moves.
+
+    python -m benchmarks.memory --artifact data.bin
+    python -m benchmarks.memory --cache-dir cache --offline
+"""
+import argparse
+import gc
+import sys
+import time
+
+from types import ModuleType, FunctionType
+from typing import Any, Set, Tuple
+
+from pogodata import PogoData
+
+CATEGORIES = ("types", "weather", "moves", "mons")
+# not part of any single object
+SKIPPED = (type, ModuleType, FunctionType)
+
+
+def deep_size(root: Any, seen: Set[int]) -> int:
+    size = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SKIPPED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        stack.extend(gc.get_referents(obj))
+        # instance dicts can be stored inline and aren't always returned as referents
+        if hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+    return size
+
+
+def measure(data: PogoData) -> Tuple[list, int]:
+    # managers are shared by all objects, so they're measured on their own
+    seen: Set[int] = set()
+    shared = 0
+    for manager in (data.icon_manager, data.language_manager):
+        shared += deep_size(manager, seen)
+
+    rows = []
+    for category in CATEGORIES:
+        objects = getattr(data, category)
+        seen.add(id(objects))
+        total = sum(deep_size(obj, seen) for obj in objects)
+        rows.append((category, len(objects), total))
+    return rows, shared
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifact", help="Load data from this artifact instead of building it")
+    parser.add_argument("--cache-dir", help="Directory downloads are cached in")
+    parser.add_argument("--offline", action="store_true", help="Only use downloads from --cache-dir")
+    args = parser.parse_args()
+
+    start = time.time()
+    data = PogoData(cache_dir=args.cache_dir, offline=args.offline, artifact=args.artifact, keep_raw=False)
+    print(f"Loaded data in {round(time.time() - start, 2)}s\n")
+
+    rows, shared = measure(data)
+    print(f"{'category':<10}{'objects':>10}{'bytes':>14}{'bytes/object':>16}")
+    for category, count, total in rows:
+        per_object = round(total / count) if count else 0
+        print(f"{category:<10}{count:>10}{total:>14}{per_object:>16}")
+    print(f"{'total':<10}{sum(r[1] for r in rows):>10}{sum(r[2] for r in rows):>14}")
+    print(f"\nIcon and language managers: {shared} bytes")
+
+
+if __name__ == "__main__":
+    main()
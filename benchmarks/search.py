@@ -0,0 +1,45 @@
+"""
+Times searches for every single letter over all names in all loaded languages and checks
+that each one is answered in well under a millisecond, with the same results as an unlimited search.
+
+    python -m benchmarks.search --artifact data.bin
+    python -m benchmarks.search --cache-dir cache --offline
+"""
+import argparse
+import string
+import time
+
+from pogodata import PogoData
+
+LIMIT = 10
+REPEATS = 100
+MAX_TIME = 0.001
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--artifact", help="Load data from this artifact instead of building it")
+    parser.add_argument("--cache-dir", help="Directory downloads are cached in")
+    parser.add_argument("--offline", action="store_true", help="Only use downloads from --cache-dir")
+    args = parser.parse_args()
+
+    data = PogoData(cache_dir=args.cache_dir, offline=args.offline, artifact=args.artifact)
+    # search indexes are built on the first search
+    data.search("a")
+
+    slowest = 0
+    for letter in string.ascii_lowercase:
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            results = data.search(letter, limit=LIMIT)
+        elapsed = (time.perf_counter() - start) / REPEATS
+        slowest = max(slowest, elapsed)
+        assert results == data.search(letter, limit=10**9)[:LIMIT], f"Different results for {letter}"
+    print(f"Slowest 1 character search: {round(slowest * 1000, 4)}ms")
+
+    assert slowest < MAX_TIME, f"1 character searches should take less than {MAX_TIME * 1000}ms"
+    print("All results are the same as without a limit")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Reloads PogoData lazily a few times, only ever using types, and checks that no download threads
+are left behind by any reload, even while the snapshot is still in use.
+
+    python -m benchmarks.threads --cache-dir cache --offline
+"""
+import argparse
+import threading
+
+from pogodata import PogoData
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cache-dir", help="Directory downloads are cached in")
+    parser.add_argument("--offline", action="store_true", help="Only use downloads from --cache-dir")
+    parser.add_argument("--reloads", type=int, default=5)
+    args = parser.parse_args()
+
+    before = threading.active_count()
+    data = PogoData(cache_dir=args.cache_dir, offline=args.offline, lazy=True)
+    data.get_types()
+
+    counts = [threading.active_count()]
+    for _ in range(args.reloads):
+        data.reload()
+        data.get_types()
+        counts.append(threading.active_count())
+    print(f"Threads before loading: {before}, after the first load and each reload: {counts}")
+
+    assert all(count == before for count in counts), "Lazy reloads left threads running"
+    print("Thread count stayed flat")
+
+
+if __name__ == "__main__":
+    main()
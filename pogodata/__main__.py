@@ -0,0 +1,27 @@
+import argparse
+
+from .pogodata import PogoData
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m pogodata")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Download and build all data, then save it as a binary artifact")
+    build.add_argument("path", help="Where to write the artifact to")
+    build.add_argument("--cache-dir", help="Directory to cache downloads in")
+    build.add_argument("--offline", action="store_true", help="Only use downloads from --cache-dir")
+    build.add_argument("--keep-raw", action="store_true",
+                       help="Also store raw protos and GameMaster entries, needed for get_gamemaster")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        data = PogoData(cache_dir=args.cache_dir, offline=args.offline, keep_raw=args.keep_raw,
+                        stream_gamemaster=not args.keep_raw)
+        data.save_artifact(args.path)
+        print(f"Saved PogoData artifact to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
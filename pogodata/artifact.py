@@ -0,0 +1,49 @@
+from __future__ import annotations
+import os
+import zlib
+import pickle
+import struct
+
+from typing import TYPE_CHECKING
+
+from .errors import PogoDataException
+
+if TYPE_CHECKING:
+    from .snapshot import Snapshot
+
+ARTIFACT_MAGIC = b"POGODATA"
+# Bump whenever the pickled layout of Snapshot or any GameObject changes
+ARTIFACT_VERSION = 12
+HEADER = struct.Struct(">8sH")
+
+
+def dump_snapshot(snapshot: Snapshot, path: str, compression: int = 6):
+    """
+    Writes a fully built snapshot (objects, enums, locales and icon indexes) to path
+    """
+    payload = zlib.compress(pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL), compression)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION))
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """
+    Restores a snapshot written by dump_snapshot, without any downloads or building
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        payload = f.read()
+
+    if len(header) < HEADER.size:
+        raise PogoDataException(f"{path} is not a PogoData artifact")
+    magic, version = HEADER.unpack(header)
+    if magic != ARTIFACT_MAGIC:
+        raise PogoDataException(f"{path} is not a PogoData artifact")
+    if version != ARTIFACT_VERSION:
+        raise PogoDataException(f"{path} has artifact version {version}, but version {ARTIFACT_VERSION} is needed. "
+                                f"Please rebuild it")
+
+    return pickle.loads(zlib.decompress(payload))
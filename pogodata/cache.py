@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import hashlib
+
+import requests
+
+from typing import Optional, Dict, Tuple, Any, Iterator
+
+from .errors import PogoDataException
+from .misc import httpget
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CachedResponse:
+    """Stand-in for requests.Response that is backed by a cached file. The body is only read when it's used.
+    """
+    def __init__(self, url: str, path: str, headers: Optional[Dict[str, str]] = None):
+        self.url = url
+        self.path = path
+        self.headers = headers or {}
+
+    def __bool__(self):
+        return True
+
+    @property
+    def content(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+
+class HttpCache:
+    """
+    Keeps raw downloads in a local directory, together with their ETag / Last-Modified headers.
+
+    Cached files are revalidated using conditional requests. If the upstream can't be reached
+    (or is rate limiting us), the cached copy is used. With offline=True, no requests are made at all.
+    """
+    def __init__(self, directory: str, offline: bool = False):
+        self.directory = directory
+        self.offline = offline
+        os.makedirs(self.directory, exist_ok=True)
+
+    def __paths(self, url: str) -> Tuple[str, str]:
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".body", base + ".json"
+
+    @staticmethod
+    def __write(path: str, chunks):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        body_path, meta_path = self.__paths(url)
+        if not os.path.exists(body_path):
+            return None
+        try:
+            with open(meta_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def cached(self, url: str) -> CachedResponse:
+        body_path, _ = self.__paths(url)
+        return CachedResponse(url, body_path)
+
+    def store(self, url: str, response, stream: bool = False) -> CachedResponse:
+        body_path, meta_path = self.__paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched": time.time()
+        }
+        if stream:
+            self.__write(body_path, response.iter_content(CHUNK_SIZE))
+        else:
+            self.__write(body_path, [response.content])
+        self.__write(meta_path, [json.dumps(meta).encode("utf-8")])
+        return CachedResponse(url, body_path, response.headers)
+
+    def get(self, url: str, immutable: bool = False, stream: bool = False) -> CachedResponse:
+        """
+        immutable: the url points to content that never changes (e.g. a git tree by commit SHA),
+        so a cached copy is used without revalidating it
+        stream: write the body to disk chunk by chunk, without ever holding all of it in memory
+        """
+        meta = self.load(url)
+
+        if self.offline:
+            if meta is None:
+                raise PogoDataException(f"Running offline, but there's no cached copy of {url}")
+            return self.cached(url)
+
+        if meta is not None and immutable:
+            return self.cached(url)
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            result = requests.get(url, headers=headers, stream=stream)
+        except Exception:
+            result = None
+
+        if meta is not None:
+            if result is not None and result.status_code == 304:
+                return self.cached(url)
+            if not result:
+                print(f"Error while requesting {url} - using cached copy")
+                return self.cached(url)
+
+        if not result:
+            result = httpget(url, stream=stream)
+        return self.store(url, result, stream)
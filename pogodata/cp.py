@@ -0,0 +1,206 @@
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import product
+from math import floor
+from typing import Union, Sequence, Iterable, Tuple, Optional, Any, Dict, List
+
+from .misc import CP_MULTIPLIERS
+from .errors import InvalidLevel, InvalidQueryArgument
+
+MIN_LEVEL = 1
+MAX_LEVEL = 55
+# CP_MULTIPLIERS in level order, levels go up in steps of 0.5. See level_index
+CPM = array("d", (CP_MULTIPLIERS[level / 2] for level in range(MIN_LEVEL * 2, MAX_LEVEL * 2 + 1)))
+LEVELS: Tuple[float, ...] = tuple(level / 2 for level in range(MIN_LEVEL * 2, MAX_LEVEL * 2 + 1))
+# every (attack, defense, stamina) IV combination
+ALL_IVS: Tuple[Tuple[int, int, int], ...] = tuple(product(range(16), repeat=3))
+# 40 and 40.0 are the same key
+_LEVEL_INDEXES: Dict[float, int] = {level: index for index, level in enumerate(LEVELS)}
+# how many CPIndexes find_stats keeps, each takes about 40 KB
+CP_INDEX_CACHE_SIZE = 256
+
+Level = Union[int, float, str]
+
+
+def level_index(level: Level) -> int:
+    """
+    Position of a level in CPM and LEVELS
+    """
+    # True == 1, but it isn't a level
+    if isinstance(level, bool):
+        raise InvalidLevel(level)
+    try:
+        index = _LEVEL_INDEXES.get(level)
+        if index is not None:
+            return index
+        doubled = float(level) * 2
+    except (TypeError, ValueError):
+        raise InvalidLevel(level)
+    if not doubled.is_integer() or not MIN_LEVEL * 2 <= doubled <= MAX_LEVEL * 2:
+        raise InvalidLevel(level)
+    return int(doubled) - MIN_LEVEL * 2
+
+
+def cp_multiplier(level: Level) -> float:
+    return CPM[level_index(level)]
+
+
+def calculate_cp(base_stats: Sequence[int], level: Level, ivs: Sequence[int]) -> int:
+    multiplier = cp_multiplier(level)
+    attack = base_stats[0] + ivs[0]
+    defense = base_stats[1] + ivs[1]
+    stamina = base_stats[2] + ivs[2]
+    return floor((attack * defense**0.5 * stamina**0.5 * multiplier**2) / 10)
+
+
+def calculate_hp(base_stats: Sequence[int], level: Level, ivs: Sequence[int]) -> int:
+    return max(10, floor((base_stats[2] + ivs[2]) * cp_multiplier(level)))
+
+
+class StatBatch:
+    """
+    CP, HP and stat products (attack * defense * HP at that level, as used for PvP rankings)
+    of many Pokemon, level and IV combinations. Values at the same position belong together.
+    """
+    def __init__(self):
+        self.cp = array("l")
+        self.hp = array("l")
+        self.stat_product = array("d")
+
+    def __len__(self):
+        return len(self.cp)
+
+
+def _base_stats(mon: Any) -> Sequence[int]:
+    # a Pokemon or its base stats
+    return getattr(mon, "base_stats", mon)
+
+
+def calculate_batch(entries: Iterable[Tuple[Any, Level, Sequence[int]]]) -> StatBatch:
+    """
+    entries: (Pokemon or base stats, level, IVs) to calculate the stats of
+    """
+    cps, hps, stat_products = [], [], []
+    for mon, level, ivs in entries:
+        base_stats = _base_stats(mon)
+        multiplier = CPM[level_index(level)]
+        squared = multiplier**2
+        attack = base_stats[0] + ivs[0]
+        defense = base_stats[1] + ivs[1]
+        stamina = base_stats[2] + ivs[2]
+        health = floor(stamina * multiplier)
+        if health < 10:
+            health = 10
+        cps.append(floor((attack * defense**0.5 * stamina**0.5 * squared) / 10))
+        hps.append(health)
+        stat_products.append(attack * defense * squared * health)
+
+    batch = StatBatch()
+    batch.cp.extend(cps)
+    batch.hp.extend(hps)
+    batch.stat_product.extend(stat_products)
+    return batch
+
+
+def calculate_grid(mon: Any,
+                   levels: Optional[Iterable[Level]] = None,
+                   ivs: Optional[Sequence[Sequence[int]]] = None) -> StatBatch:
+    """
+    Stats of one Pokemon at every combination of levels and IVs: all IVs at the first level, then all
+    IVs at the next one. By default all levels (LEVELS) and all 4096 IV combinations (ALL_IVS).
+
+    Square roots and multipliers are only calculated once per stat and level, results are the same
+    as calculate_cp's.
+    """
+    base_attack, base_defense, base_stamina = _base_stats(mon)
+    indexes = [level_index(level) for level in (LEVELS if levels is None else levels)]
+    ivs = ALL_IVS if ivs is None else ivs
+
+    attacks = [base_attack + iv[0] for iv in ivs]
+    defenses = [base_defense + iv[1] for iv in ivs]
+    staminas = [base_stamina + iv[2] for iv in ivs]
+    # attack * sqrt(defense) * sqrt(stamina), in the same order calculate_cp multiplies them
+    roots = [a * d**0.5 * s**0.5 for a, d, s in zip(attacks, defenses, staminas)]
+    products = [a * d for a, d in zip(attacks, defenses)]
+
+    batch = StatBatch()
+    for index in indexes:
+        multiplier = CPM[index]
+        squared = multiplier**2
+        batch.cp.extend([floor(root * squared / 10) for root in roots])
+        health = [max(10, floor(s * multiplier)) for s in staminas]
+        batch.hp.extend(health)
+        batch.stat_product.extend([p * squared * h for p, h in zip(products, health)])
+    return batch
+
+
+class CPIndex:
+    """
+    All IV combinations of one base stat combination, ordered by attack * sqrt(defense) * sqrt(stamina).
+    CP only grows with that value at every level, so the IVs that have a CP at some level are
+    a single slice of this order, which is found by bisecting.
+    """
+    __slots__ = ("roots", "ivs")
+
+    def __init__(self, base_stats: Sequence[int]):
+        base_attack, base_defense, base_stamina = base_stats
+        # multiplied in the same order as in calculate_cp
+        roots = [(base_attack + attack) * (base_defense + defense)**0.5 * (base_stamina + stamina)**0.5
+                 for attack, defense, stamina in ALL_IVS]
+        order = sorted(range(len(ALL_IVS)), key=roots.__getitem__)
+        self.roots = array("d", (roots[index] for index in order))
+        self.ivs = array("H", order)
+
+    def __first_above(self, cp: int, squared: float, start: int = 0) -> int:
+        # position of the first IVs with a CP above cp. Rounding may put the bisected position
+        # one off, so it's corrected using calculate_cp's formula.
+        roots = self.roots
+        position = bisect_left(roots, (cp + 1) * 10 / squared, start)
+        while position > start and floor(roots[position - 1] * squared / 10) > cp:
+            position -= 1
+        while position < len(roots) and floor(roots[position] * squared / 10) <= cp:
+            position += 1
+        return position
+
+    def find(self, cp: int, min_level: Level = MIN_LEVEL, max_level: Level = MAX_LEVEL) -> List[Tuple[float, Tuple[int, int, int]]]:
+        """
+        Every (level, IVs) between min_level and max_level with this CP, by level and IVs
+        """
+        try:
+            cp = int(cp)
+        except (TypeError, ValueError):
+            raise InvalidQueryArgument(cp)
+
+        results = []
+        for index in range(level_index(min_level), level_index(max_level) + 1):
+            squared = CPM[index]**2
+            start = self.__first_above(cp - 1, squared)
+            end = self.__first_above(cp, squared, start)
+            if start < end:
+                level = LEVELS[index]
+                results += [(level, ALL_IVS[iv]) for iv in sorted(self.ivs[start:end])]
+        return results
+
+
+@lru_cache(maxsize=CP_INDEX_CACHE_SIZE)
+def cp_index(base_stats: Tuple[int, int, int]) -> CPIndex:
+    return CPIndex(base_stats)
+
+
+def find_stats(mon: Any,
+               cp: int,
+               min_level: Level = MIN_LEVEL,
+               max_level: Level = MAX_LEVEL) -> List[Tuple[float, Tuple[int, int, int]]]:
+    """
+    The levels and IVs a Pokemon (or base stats) can have to be at this CP, e.g. of a raid boss
+    caught at level 20 or 25. Indexes are built on first use and the most recent CP_INDEX_CACHE_SIZE are kept.
+    """
+    return cp_index(tuple(_base_stats(mon))).find(cp, min_level, max_level)
+
+
+def find_stats_batch(observations: Iterable[Sequence[Any]]) -> List[List[Tuple[float, Tuple[int, int, int]]]]:
+    """
+    observations: (Pokemon or base stats, CP) or (Pokemon or base stats, CP, min level, max level)
+    """
+    return [find_stats(*observation) for observation in observations]
@@ -1,5 +1,6 @@
+from abc import ABC, abstractmethod
 from enum import Enum
-from typing import Union, Any
+from typing import Union, Any, Callable, Optional, Dict
 
 from .errors import InvalidQueryArgument, NoORANDMixingInQList
 
@@ -9,6 +10,10 @@ class DefaultEnum(Enum):
 
 
 class CustomEnum:
+    __slots__ = ("id", "tmpl")
+    # CustomEnums are never changed, so every unset one is the same object
+    _default: Optional["CustomEnum"] = None
+
     def __init__(self, enum: Enum):
         self.id = enum.value
         self.tmpl = enum.name
@@ -16,9 +21,108 @@ class CustomEnum:
     def __bool__(self):
         return bool(self.id)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "tmpl": self.tmpl}
+
     @classmethod
     def default(cls):
-        return cls(DefaultEnum.UNSET)
+        if cls._default is None:
+            cls._default = cls(DefaultEnum.UNSET)
+        return cls._default
+
+
+class Predicate(ABC):
+    """
+    One query argument, parsed once and then matched against the values of many objects
+    """
+    def __init__(self, original: Any):
+        self.original = original
+
+    @abstractmethod
+    def matches(self, to_match: Any) -> bool:
+        pass
+
+
+class EqualsPredicate(Predicate):
+    def matches(self, to_match: Any) -> bool:
+        return self.original == to_match
+
+
+class EnumPredicate(Predicate):
+    """
+    Matches an enum's id or template name
+    """
+    def __init__(self, original: Union[str, int]):
+        super().__init__(original)
+        self.tmpl = str(original)
+
+    def matches(self, to_match: CustomEnum) -> bool:
+        return self.original == to_match.id or self.tmpl == to_match.tmpl
+
+
+class NumberPredicate(Predicate):
+    """
+    5 matches values equal to 5, >5 values greater than 5 and <5 values less than 5
+    """
+    def __init__(self, original: Union[str, int, float], intfloat: Callable):
+        super().__init__(original)
+        self.operator = "="
+        number = original
+        if isinstance(original, str) and original[:1] in (">", "<"):
+            self.operator = original[0]
+            number = original[1:]
+
+        try:
+            self.number = intfloat(number)
+        except (TypeError, ValueError):
+            raise InvalidQueryArgument(original)
+
+    def matches(self, to_match: Union[int, float, None]) -> bool:
+        if to_match is None:
+            return False
+        if self.operator == ">":
+            return to_match > self.number
+        if self.operator == "<":
+            return to_match < self.number
+        return to_match == self.number
+
+
+class ListPredicate(Predicate):
+    """
+    a matches lists containing a, a,b lists containing a and b, a|b lists containing a or b.
+    :a|b is the same as a,b
+    """
+    SINGLE = 0
+    ALL = 1
+    ANY = 2
+
+    def __init__(self, original: Any):
+        super().__init__(original)
+        self.mode = self.SINGLE
+        self.values = [original]
+        if not isinstance(original, str):
+            return
+
+        if original.startswith(":"):
+            original = original[1:].replace("|", ",")
+
+        if "," in original and "|" in original:
+            raise NoORANDMixingInQList(self.original)
+        elif "," in original:
+            self.mode = self.ALL
+            self.values = list(set(original.split(",")))
+        elif "|" in original:
+            self.mode = self.ANY
+            self.values = original.split("|")
+        else:
+            self.values = [original]
+
+    def matches(self, to_match: Any) -> bool:
+        if self.mode == self.ALL:
+            return all(value in to_match for value in self.values)
+        if self.mode == self.ANY:
+            return any(value in to_match for value in self.values)
+        return self.values[0] in to_match
 
 
 class QueryType:
@@ -38,59 +142,18 @@ class QueryType:
     def float_(original: float, to_match: float):
         return original == to_match
 
-    @staticmethod
-    def __qint_or_qfloat(original, to_match, intfloat):
-        try:
-            return int(original) == to_match
-        except ValueError:
-            pass
-
-        if original.startswith(">"):
-            try:
-                return int(original[1:]) < to_match
-            except ValueError:
-                raise InvalidQueryArgument(original)
-
-        if original.startswith("<"):
-            try:
-                return int(original[1:]) > to_match
-            except ValueError:
-                raise InvalidQueryArgument(original)
-
-        raise InvalidQueryArgument(original)
-
     @staticmethod
     def customenum(original: Union[str, int], to_match: CustomEnum):
-        return original == to_match.id or str(original) == to_match.tmpl
+        return EnumPredicate(original).matches(to_match)
 
     @staticmethod
     def qint(original: Union[str, int], to_match: int):
-        QueryType.__qint_or_qfloat(original, to_match, int)
+        return NumberPredicate(original, int).matches(to_match)
 
     @staticmethod
     def qfloat(original: Union[str, float], to_match: float):
-        QueryType.__qint_or_qfloat(original, to_match, float)
+        return NumberPredicate(original, float).matches(to_match)
 
     @staticmethod
     def qlist(original: Any, to_match: list):
-        if original.startswith(":"):
-            match_complete = True
-            original = original[1:].replace("|", ",")
-        else:
-            match_complete = False
-
-        if "," in original and "|" in original:
-            raise NoORANDMixingInQList(original)
-
-        elif "," in original:
-            original_list = set(original.split(","))
-            if len([o for o in original_list if o in to_match]) >= len(original_list):
-                return True
-
-        elif "|" in original:
-            original_list = original.split("|")
-            if set(original_list) & set(to_match):
-                return True
-
-        else:
-            return bool(original in to_match)
\ No newline at end of file
+        return ListPredicate(original).matches(to_match)
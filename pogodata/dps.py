@@ -0,0 +1,223 @@
+import multiprocessing
+import os
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from math import floor
+from typing import Dict, List, Sequence, Optional, Any, Tuple, FrozenSet
+
+from .cp import cp_multiplier
+from .errors import InvalidQueryArgument
+
+STAB = 1.2
+WEATHER_BOOST = 1.2
+# DPS and TDO are calculated against a neutral target with this defense
+TARGET_DEFENSE = 160
+LEVEL = 40
+IVS = (15, 15, 15)
+
+OUTPUTS = ("dps", "tdo", "dpt", "ept", "dpe")
+
+# PvE power, energy gain, duration in seconds, PvP power, energy gain and turns, with STAB and weather boosts
+FastMove = Tuple[float, int, float, float, int, int]
+# PvE power, energy cost, duration and start of the damage window in seconds, PvP power and energy cost
+ChargedMove = Tuple[float, int, float, float, float, int]
+
+
+def _divide(a: float, b: float) -> float:
+    return a / b if b else 0.0
+
+
+def _boost(move: Any, own_types: FrozenSet[int], boosted: FrozenSet[int]) -> Tuple[float, float]:
+    # PvE and PvP power multipliers
+    stab = STAB if move.type.proto.id in own_types else 1
+    weather = WEATHER_BOOST if move.type.proto.id in boosted else 1
+    return stab * weather, stab
+
+
+def _fast_move(move: Any, own_types: FrozenSet[int], boosted: FrozenSet[int]) -> FastMove:
+    pve_boost, pvp_boost = _boost(move, own_types, boosted)
+    return (move.pve["power"] * pve_boost, move.pve["energy_delta"], move.pve["duration"] / 1000,
+            move.pvp["power"] * pvp_boost, move.pvp["energy_delta"], move.pvp["turns"])
+
+
+def _charged_move(move: Any, own_types: FrozenSet[int], boosted: FrozenSet[int]) -> ChargedMove:
+    pve_boost, pvp_boost = _boost(move, own_types, boosted)
+    return (move.pve["power"] * pve_boost, abs(move.pve["energy_delta"]), move.pve["duration"] / 1000,
+            move.pve["window"]["start"] / 1000, move.pvp["power"] * pvp_boost, abs(move.pvp["energy_delta"]))
+
+
+def _calculate(base_stats: Sequence[int],
+               fast_moves: Sequence[FastMove],
+               charged_moves: Sequence[ChargedMove]) -> Dict[str, List[float]]:
+    """
+    Stats of every combination of fast_moves and charged_moves of one Pokemon, fast moves first.
+
+    DPS and TDO use GamePress' comprehensive DPS formula against a neutral target, with the attacker
+    taking 900 / defense damage per second. DPT, EPT and DPE are the PvP damage per turn and energy
+    per turn of the fast move and damage per energy of the charged move.
+    Everything that only depends on the Pokemon or on one of its moves is calculated once,
+    the loop over combinations only combines it.
+    """
+    multiplier = cp_multiplier(LEVEL)
+    attack = (base_stats[0] + IVS[0]) * multiplier
+    defense = (base_stats[1] + IVS[1]) * multiplier
+    hp = max(10, floor((base_stats[2] + IVS[2]) * multiplier))
+    # damage taken per second
+    incoming = 900 / defense
+
+    fast_terms = []
+    for power, energy, duration, pvp_power, pvp_energy, turns in fast_moves:
+        damage = floor(0.5 * power * attack / TARGET_DEFENSE) + 1
+        fast_terms.append((_divide(damage, duration), _divide(energy, duration), energy,
+                           _divide(pvp_power, turns), _divide(pvp_energy, turns)))
+
+    charged_terms = []
+    for power, energy, duration, window, pvp_power, pvp_energy in charged_moves:
+        damage = floor(0.5 * power * attack / TARGET_DEFENSE) + 1
+        # one bar moves waste the energy gained while they're used, see below
+        one_bar = 0.5 * incoming * window if energy >= 100 else None
+        charged_terms.append((_divide(damage, duration), _divide(energy, duration), energy, duration, one_bar,
+                              _divide(pvp_power, pvp_energy)))
+
+    results = {name: [] for name in OUTPUTS}
+    dps_column, tdo_column = results["dps"], results["tdo"]
+    for fast_dps, fast_eps, fast_energy, dpt, ept in fast_terms:
+        for charged_dps, charged_eps, charged_energy, charged_duration, one_bar, dpe in charged_terms:
+            if one_bar is not None:
+                charged_eps = _divide(charged_energy + 0.5 * fast_energy + one_bar, charged_duration)
+
+            if fast_dps > charged_dps or not fast_eps + charged_eps:
+                dps = fast_dps
+            else:
+                # energy gained from damage taken
+                gained = 0.5 * charged_energy + 0.5 * fast_energy
+                dps = (fast_dps * charged_eps + charged_dps * fast_eps) / (charged_eps + fast_eps)
+                dps += (charged_dps - fast_dps) / (charged_eps + fast_eps) * (0.5 - gained / hp) * incoming
+            dps_column.append(dps)
+            tdo_column.append(dps * hp / incoming)
+
+        results["dpt"] += [dpt] * len(charged_terms)
+        results["ept"] += [ept] * len(charged_terms)
+        results["dpe"] += [terms[-1] for terms in charged_terms]
+    return results
+
+
+class Moveset:
+    """
+    One row of a MovesetTable
+    """
+    def __init__(self, mon: Any, fast: Any, charged: Any, **values: float):
+        self.mon = mon
+        self.fast = fast
+        self.charged = charged
+        self.dps: float = values["dps"]
+        self.tdo: float = values["tdo"]
+        self.dpt: float = values["dpt"]
+        self.ept: float = values["ept"]
+        self.dpe: float = values["dpe"]
+
+    def __repr__(self):
+        return f"<Moveset {self.mon.id} {self.fast.proto.tmpl} {self.charged.proto.tmpl} {round(self.dps, 2)} DPS>"
+
+
+class MovesetTable:
+    """
+    DPS, TDO and PvP stats of every combination of a Pokemon's fast and charged moves (including elite moves),
+    one row per combination. Rows are stored as columns: mons, fast and charged hold objects,
+    dps, tdo, dpt, ept and dpe arrays of floats.
+
+    Attackers are at LEVEL with IVS. Moves get STAB if their type is one of the Pokemon's, and in PvE
+    a weather boost if the weather boosts their type. Pokemon with the same base stats, types and moves
+    (e.g. costumes) share one calculation.
+
+    weather: a Weather, or None for no weather boosts
+    max_workers: processes to calculate in. 0 (the default) calculates in this process, None starts
+        one per CPU. Like RankTables' workers they're spawned, so scripts using them need
+        an `if __name__ == "__main__":` guard. Starting them takes longer than calculating most tables.
+    """
+    def __init__(self, mons: Sequence[Any], weather: Any = None, max_workers: Optional[int] = 0):
+        self.weather = weather
+        self.mons: List[Any] = []
+        self.fast: List[Any] = []
+        self.charged: List[Any] = []
+        self.__positions: Dict[Any, List[int]] = {}
+
+        boosted = frozenset(t.proto.id for t in weather.boosts) if weather is not None else frozenset()
+        # _calculate's arguments for every distinct block, and the block of every mon
+        blocks: Dict[Tuple, int] = {}
+        base_stats: List[Sequence[int]] = []
+        fast_terms: List[List[FastMove]] = []
+        charged_terms: List[List[ChargedMove]] = []
+        mon_blocks: List[int] = []
+
+        for mon in mons:
+            if len(mon.base_stats) != 3:
+                continue
+            own_types = frozenset(t.proto.id for t in mon.types)
+            moves = list({id(move): move for move in mon.moves + mon.elite_moves}.values())
+            fast_moves = [move for move in moves if move.fast]
+            charged_moves = [move for move in moves if not move.fast]
+
+            start = len(self.mons)
+            for fast in fast_moves:
+                for charged in charged_moves:
+                    self.mons.append(mon)
+                    self.fast.append(fast)
+                    self.charged.append(charged)
+            self.__positions.setdefault(mon, []).extend(range(start, len(self.mons)))
+
+            key = (tuple(mon.base_stats), own_types, tuple(map(id, fast_moves)), tuple(map(id, charged_moves)))
+            block = blocks.get(key)
+            if block is None:
+                block = blocks[key] = len(base_stats)
+                base_stats.append(tuple(mon.base_stats))
+                fast_terms.append([_fast_move(move, own_types, boosted) for move in fast_moves])
+                charged_terms.append([_charged_move(move, own_types, boosted) for move in charged_moves])
+            mon_blocks.append(block)
+
+        calculated = self.__calculate(base_stats, fast_terms, charged_terms, max_workers)
+        results = {name: [] for name in OUTPUTS}
+        for block in mon_blocks:
+            for name in OUTPUTS:
+                results[name] += calculated[block][name]
+
+        self.dps = array("d", results["dps"])
+        self.tdo = array("d", results["tdo"])
+        self.dpt = array("d", results["dpt"])
+        self.ept = array("d", results["ept"])
+        self.dpe = array("d", results["dpe"])
+
+    @staticmethod
+    def __calculate(base_stats: List[Sequence[int]],
+                    fast_terms: List[List[FastMove]],
+                    charged_terms: List[List[ChargedMove]],
+                    max_workers: Optional[int]) -> List[Dict[str, List[float]]]:
+        if max_workers == 0:
+            return list(map(_calculate, base_stats, fast_terms, charged_terms))
+        workers = max_workers or os.cpu_count() or 1
+        # a few chunks per process, so they finish at about the same time
+        chunksize = max(1, len(base_stats) // (workers * 4))
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            return list(executor.map(_calculate, base_stats, fast_terms, charged_terms, chunksize=chunksize))
+
+    def __len__(self):
+        return len(self.mons)
+
+    def __row(self, position: int) -> Moveset:
+        return Moveset(self.mons[position], self.fast[position], self.charged[position],
+                       **{name: getattr(self, name)[position] for name in OUTPUTS})
+
+    def best(self, mon: Any = None, key: str = "dps", limit: Optional[int] = None) -> List[Moveset]:
+        """
+        Movesets sorted by a stat, highest first
+
+        mon: only the movesets of this Pokemon (from the same snapshot)
+        key: dps, tdo, dpt, ept or dpe
+        """
+        if key not in OUTPUTS:
+            raise InvalidQueryArgument(key)
+        values = getattr(self, key)
+        positions = self.__positions.get(mon, []) if mon is not None else range(len(self.mons))
+        positions = sorted(positions, key=values.__getitem__, reverse=True)[:limit]
+        return [self.__row(position) for position in positions]
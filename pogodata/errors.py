@@ -6,6 +6,22 @@ class PogoDataException(Exception):
     """
 
 
+class InvalidLevel(PogoDataException):
+    def __init__(self, level):
+        message = f"Invalid level `{level}`. Levels go from 1 to 55 in steps of 0.5"
+        super().__init__(message)
+
+
+class RawDataDropped(PogoDataException):
+    def __init__(self, what, streamed=False):
+        if streamed:
+            message = (f"{what} isn't available because only the GameMaster entries needed for building were kept. "
+                       "Use stream_gamemaster=False to keep all of them")
+        else:
+            message = f"{what} isn't available because raw data was dropped after building. Use keep_raw=True to keep it"
+        super().__init__(message)
+
+
 class QueryException(Exception):
     """Base exception for Query Errors.
     """
@@ -0,0 +1,79 @@
+from __future__ import annotations
+import os
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Tuple, Optional, Callable, TYPE_CHECKING
+
+from .misc import httpget, get_repo_content
+
+if TYPE_CHECKING:
+    from .cache import HttpCache
+    from .metrics import ReloadStats, StageStats
+
+
+class Fetcher:
+    """
+    Runs downloads on a bounded thread pool. Everything is submitted up front and results are
+    picked up as futures, so independent downloads don't wait on each other.
+    Identical requests (e.g. the PokeMiners tree for icons and costumes) share one download.
+
+    stats: record a "download:<url>" stage for every download
+    """
+    def __init__(self,
+                 cache: Optional[HttpCache] = None,
+                 max_workers: int = 8,
+                 stats: Optional[ReloadStats] = None):
+        self.cache = cache
+        self.stats = stats
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pogodata-fetch")
+        self.__futures: Dict[Tuple, Future] = {}
+        self.__lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+
+    def __submit(self, key: Tuple, name: str, stream: bool, func: Callable, *args) -> Future:
+        with self.__lock:
+            future = self.__futures.get(key)
+            if future is None:
+                future = self.__pool.submit(self.__run, name, stream, func, *args)
+                self.__futures[key] = future
+        return future
+
+    def __run(self, name: str, stream: bool, func: Callable, *args):
+        if self.stats is None:
+            return func(*args)
+        with self.stats.stage("download:" + name) as stage:
+            result = func(*args)
+            self.__measure(stage, result, stream)
+        return result
+
+    @staticmethod
+    def __measure(stage: StageStats, result, stream: bool):
+        if isinstance(result, list):
+            # repo contents
+            stage.objects = len(result)
+        elif getattr(result, "path", None):
+            # cached responses only read their body when it's used
+            stage.bytes_fetched = os.path.getsize(result.path)
+        elif stream:
+            # reading the body here would defeat streaming it
+            stage.bytes_fetched = int(result.headers.get("Content-Length", 0))
+        else:
+            stage.bytes_fetched = len(result.content)
+
+    def get(self, url: str, stream: bool = False) -> Future:
+        """
+        stream: don't load the body yet, it's read through the response's iter_content()
+        """
+        return self.__submit(("get", url, stream), url, stream, httpget, url, self.cache, False, stream)
+
+    def repo_content(self, repo_url: str, sha_url: str) -> Future:
+        return self.__submit(("repo", repo_url, sha_url), sha_url, False,
+                             get_repo_content, repo_url, sha_url, self.cache)
+
+    def shutdown(self):
+        self.__pool.shutdown(wait=True)
@@ -0,0 +1,162 @@
+import re
+import json
+import codecs
+
+from typing import List, Dict, Tuple, Iterable, Iterator, Optional, Callable, Collection
+
+FAMILY_REGEX = re.compile(r"^(?:.*?V####_[^_]+_|[^_]*_?)")
+PATTERN_PREFIX_REGEX = re.compile(r"(\\d\{(\d+)\}|\\d|\\\W|[^\\.^$*+?{}\[\]|()])")
+
+
+def _normalize(templateid: str) -> str:
+    return re.sub(r"\d", "#", templateid)
+
+
+def _family(templateid: str) -> str:
+    """
+    V0001_POKEMON_BULBASAUR -> V####_POKEMON_
+    COMBAT_V0013_MOVE_WRAP -> COMBAT_V####_MOVE_
+    WEATHER_AFFINITY_CLEAR -> WEATHER_
+    """
+    return FAMILY_REGEX.match(_normalize(templateid)).group(0)
+
+
+def _pattern_prefix(pattern: str) -> Tuple[Optional[str], bool]:
+    """
+    Returns the prefix every templateId matching an anchored pattern starts with (digit classes
+    turned into #, like _normalize() does) and whether that prefix is all there is to the pattern.
+    ^V\\d{4}_POKEMON_.* -> (V####_POKEMON_, False)
+    ^WEATHER_AFFINITY_.* -> (WEATHER_AFFINITY_, True)
+    """
+    if not pattern.startswith("^") or "|" in pattern:
+        return None, False
+
+    prefix = ""
+    literal = True
+    pos = 1
+    while pos < len(pattern):
+        token = PATTERN_PREFIX_REGEX.match(pattern, pos)
+        if not token:
+            break
+        # a quantifier makes the last token optional or repeated
+        if token.end() < len(pattern) and pattern[token.end()] in "*+?{":
+            break
+        text, repeat = token.groups()
+        if text.startswith("\\d"):
+            prefix += "#" * int(repeat or 1)
+            literal = False
+        elif text.startswith("\\"):
+            prefix += text[1]
+        else:
+            prefix += text
+        pos = token.end()
+
+    rest = pattern[pos:]
+    return prefix, literal and rest in ("", ".*")
+
+
+def iter_gamemaster(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """
+    Parses the GameMaster JSON array entry by entry from a stream of byte chunks,
+    so that the whole document never has to be in memory at once.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+
+    while True:
+        # skip whitespace, the opening bracket and commas between entries
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+            if buffer[pos] == "[":
+                started = True
+            pos += 1
+
+        if pos < len(buffer) and buffer[pos] == "]" and started:
+            return
+
+        if pos < len(buffer):
+            try:
+                entry, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if finished:
+                    raise
+            else:
+                yield entry
+                continue
+        elif finished:
+            return
+
+        chunk = next(chunks, None)
+        if chunk is None:
+            finished = True
+            buffer = buffer[pos:] + utf8.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + utf8.decode(chunk)
+        pos = 0
+
+
+class GameMasterIndex:
+    """
+    Groups GameMaster entries by templateId family (V####_POKEMON_, FORMS_V####_POKEMON_, COMBAT_V####_MOVE_, ...),
+    so a lookup only has to look at entries that can possibly match.
+
+    settings: only keep the data of entries with one of these settings, everything else is dropped right away
+    and only its templateId is kept
+    """
+    def __init__(self, entries: Iterable[Dict] = (), settings: Optional[Collection[str]] = None):
+        self.entries: List[Tuple[str, Dict]] = []
+        self.by_family: Dict[str, List[int]] = {}
+        self.settings = settings
+
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry: Dict):
+        templateid = entry.get("templateId", "")
+        data = entry.get("data", {})
+        if self.settings is not None and not any(key in data for key in self.settings):
+            data = {}
+        position = len(self.entries)
+        self.entries.append((templateid, data))
+        self.by_family.setdefault(_family(templateid), []).append(position)
+
+    def __candidates(self, prefix: Optional[str]) -> Iterable[int]:
+        if not prefix:
+            return range(len(self.entries))
+        prefix = _normalize(prefix)
+        families = [
+            positions for family, positions in self.by_family.items()
+            if family.startswith(prefix) or prefix.startswith(family)
+        ]
+        if len(families) == 1:
+            return families[0]
+        return sorted(p for positions in families for p in positions)
+
+    def get(self, pattern: str, settings: Optional[str] = None) -> List[Tuple[str, Dict]]:
+        """
+        Returns (templateId, data) of all entries with a templateId matching pattern (using re.search).
+        If settings is given, data is just these settings, or {} for entries that don't have them.
+        """
+        prefix, literal = _pattern_prefix(pattern)
+        if literal:
+            literal_prefix = prefix
+            matches: Callable[[str], bool] = lambda t: t.startswith(literal_prefix)
+        else:
+            matches = re.compile(pattern).search
+
+        result = []
+        for position in self.__candidates(prefix):
+            templateid, data = self.entries[position]
+            if not matches(templateid):
+                continue
+            if settings:
+                data = data.get(settings, {})
+            result.append((templateid, data))
+        return result
@@ -1,19 +1,136 @@
-from copy import deepcopy
+import copy
+
 from enum import Enum
-from typing import Dict, Tuple, Callable, Any, Optional, Union
+from functools import lru_cache
+from collections.abc import Mapping
+from typing import Dict, Callable, Any, Optional, Union, Tuple, Iterator
 
 from .icons import IconManager
-from .errors import UnknownLanguage
+from .errors import UnknownLanguage, RawDataDropped
 from .language import Language
-from .custom_types import CustomEnum
+from .custom_types import CustomEnum, Predicate
+from .query import compile_query
+
+
+@lru_cache(maxsize=None)
+def slot_names(cls: type) -> Tuple[str, ...]:
+    """
+    All attributes declared in the __slots__ of cls and its base classes, base classes first
+    """
+    names = []
+    for base in reversed(cls.__mro__):
+        names += base.__dict__.get("__slots__", ())
+    return tuple(names)
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+    def __reduce__(self):
+        # unpickles as the same object
+        return "_MISSING"
+
+
+_MISSING = _Missing()
+
+
+class _DroppedRaw:
+    """
+    GameObject.raw after raw data was dropped (keep_raw=False). Reading it raises RawDataDropped,
+    so it can't be mistaken for an entry without any data.
+    """
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        raise RawDataDropped("GameObject.raw")
+
+    def __getitem__(self, key):
+        raise RawDataDropped("GameObject.raw")
+
+    def __contains__(self, key):
+        raise RawDataDropped("GameObject.raw")
+
+    def __iter__(self):
+        raise RawDataDropped("GameObject.raw")
+
+    def __len__(self):
+        raise RawDataDropped("GameObject.raw")
+
+    def __repr__(self):
+        return "<dropped raw data>"
+
+    def __reduce__(self):
+        # unpickles as the same object
+        return "DROPPED_RAW"
+
+
+DROPPED_RAW = _DroppedRaw()
+
+
+@lru_cache(maxsize=None)
+def _query_positions(cls: type) -> Dict[str, int]:
+    return {key: position for position, key in enumerate(cls.QUERY_SCHEMA)}
+
+
+class QueryValues(Mapping):
+    """
+    The query values of one object, in the order of its class' QUERY_SCHEMA.
+    Keys are only stored once per class, not in every object.
+    """
+    __slots__ = ("_positions", "_values")
+
+    def __init__(self, cls: type, values: Dict[str, Any]):
+        self._positions: Dict[str, int] = _query_positions(cls)
+        packed = [_MISSING] * len(self._positions)
+        for key, value in values.items():
+            packed[self._positions[key]] = value
+        self._values: Tuple[Any, ...] = tuple(packed)
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[self._positions[key]]
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        position = self._positions.get(key)
+        return position is not None and self._values[position] is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, position in self._positions.items() if self._values[position] is not _MISSING)
+
+    def __len__(self) -> int:
+        return sum(1 for value in self._values if value is not _MISSING)
+
+    def __repr__(self):
+        return repr(dict(self))
 
 
 class _CopyableClass:
+    __slots__ = ()
+    # containers that are only ever replaced, never changed, so copies keep sharing them
+    _SHARED_FIELDS: Tuple[str, ...] = ()
+
     def copy(self):
-        return deepcopy(self)
+        """
+        A variant of this object that shares everything with it (raw data, moves, types, icon manager...)
+        except its own lists, dicts and sets, so fields can be replaced or appended to without
+        affecting the original. Nested containers are shared and must be replaced, not changed.
+        """
+        new = copy.copy(self)
+        for key in slot_names(type(self)):
+            if key in self._SHARED_FIELDS:
+                continue
+            value = getattr(new, key, None)
+            if isinstance(value, (list, dict, set)):
+                setattr(new, key, value.copy())
+        return new
 
 
 class BaseGameObject(_CopyableClass):
+    __slots__ = ()
+
     def __bool__(self):
         return True
 
@@ -28,6 +145,11 @@ class BaseGameObject(_CopyableClass):
 
 
 class GameObject(BaseGameObject):
+    __slots__ = ("icon_manager", "raw", "id", "proto", "names", "_query")
+    _SHARED_FIELDS = ("raw", "names")
+    # query key: QueryType. Values are taken from self.query, see make_query
+    QUERY_SCHEMA: Dict[str, Callable] = {}
+
     def __init__(self,
                  icon_manager: Optional[IconManager] = None,
                  gamemaster_entry: Optional[Dict] = None):
@@ -43,11 +165,19 @@ class GameObject(BaseGameObject):
         self.id: int = 0
         self.proto: CustomEnum = CustomEnum.default()
         self.names: Dict[str, str] = {}
-        self.query: Dict[str, Tuple[Callable, Any]] = {}
+        self.query = {}
 
     def __bool__(self):
         return bool(self.proto.id)
 
+    @property
+    def query(self) -> QueryValues:
+        return self._query
+
+    @query.setter
+    def query(self, values: Dict[str, Any]):
+        self._query = QueryValues(type(self), values)
+
     def __repr__(self):
         return f"<{type(self).__name__} {self.proto.id}:{self.proto.tmpl}>"
 
@@ -64,18 +194,20 @@ class GameObject(BaseGameObject):
         return var.get(str(language.value), var[Language.ENGLISH.value])
 
     def compare(self, **kwargs) -> bool:
-        if "id" in kwargs:
+        if "id" in kwargs and "id" not in self.QUERY_SCHEMA:
             if int(kwargs["id"]) == self.id:
                 return True
             return False
 
-        for key, value in kwargs.items():
-            to_compare = self.query.get(key)
-
-            if not to_compare:
-                continue
+        return self.matches(compile_query(self.QUERY_SCHEMA, kwargs))
 
-            if not to_compare[0](value, to_compare[1]):
+    def matches(self, predicates: Dict[str, Predicate]) -> bool:
+        """
+        predicates: a query compiled by compile_query
+        """
+        query = self._query
+        for key, predicate in predicates.items():
+            if key in query and not predicate.matches(query[key]):
                 return False
 
         return True
@@ -1,12 +1,16 @@
 from __future__ import annotations
 import re
 from enum import Enum
+from threading import Lock
+from concurrent.futures import Future
 from typing import Tuple, Dict, Union, List, TYPE_CHECKING, Optional
 
-from .misc import get_repo_content, EnumMatcher
+from .misc import EnumMatcher
+from .fetch import Fetcher
 
 if TYPE_CHECKING:
     from .pokemon import Pokemon
+    from .cache import HttpCache
 
 
 class IconSet(EnumMatcher):
@@ -166,31 +170,85 @@ ICON_DETAILS = {
 
 
 class IconSetManager:
-    def __init__(self, iconset: IconSet):
+    def __init__(self, iconset: IconSet, icons: List[str]):
         self.iconset = iconset
         self.details = ICON_DETAILS[self.iconset]
         self.url = self.details["url"]
         self.type = self.details["type"]
+        self.icons = [re.sub(r"[^\/]*\/", "", i) for i in icons]
 
-        match = re.match(r"https://raw\.githubusercontent\.com/([^/]*)/([^/]*)/([^/]*).*", self.url)
+    @staticmethod
+    def fetch(iconset: IconSet, fetcher: Fetcher) -> Future:
+        url = ICON_DETAILS[iconset]["url"]
+        match = re.match(r"https://raw\.githubusercontent\.com/([^/]*)/([^/]*)/([^/]*).*", url)
         user, repo, branch = match.groups()
 
         base_api = f"https://api.github.com/repos/{user}/{repo}/"
         sha_url = base_api + f"branches/{branch}"
         files_url = base_api + "git/trees/{sha}?recursive=true"
-        icons = get_repo_content(files_url, sha_url)
-        self.icons = [re.sub(r"[^\/]*\/", "", i) for i in icons]
+        return fetcher.repo_content(files_url, sha_url)
 
 
 class IconManager:
-    def __init__(self):
+    def __init__(self, fetcher: Optional[Fetcher] = None, lazy: bool = False, cache: Optional[HttpCache] = None):
+        """
+        fetcher: download the file trees through this fetcher instead of an own, short-lived one.
+            It's only used while loading, so a lazy IconManager shouldn't get one that's shut down before.
+        lazy: only download the iconsets' file trees once the first icon is requested
+        cache: what the IconManager's own fetcher caches downloads in
+        """
         self.iconsets: Dict[IconSet, IconSetManager] = {}
-        for iconset in IconSet:
+        self.__lazy = lazy
+        self.__fetcher = fetcher
+        self.__cache = cache
+        self.__lock = Lock()
+        if not lazy:
+            self.__load_fetcher()
+
+    def __getstate__(self):
+        self.__load_lazily()
+        state = self.__dict__.copy()
+        del state["_IconManager__lock"]
+        state["_IconManager__cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = Lock()
+
+    def __load_fetcher(self):
+        if self.__fetcher is None:
+            with Fetcher(self.__cache) as fetcher:
+                self.__load(fetcher)
+        else:
+            self.__load(self.__fetcher)
+        self.__fetcher = None
+
+    def __load_lazily(self):
+        with self.__lock:
+            if self.__lazy:
+                self.__load_fetcher()
+                self.__lazy = False
+
+    def __load(self, fetcher: Fetcher):
+        for iconset, download in self.fetch(fetcher).items():
             print(f"IconManager: Preparing iconset {iconset.name}")
-            self.iconsets[iconset] = IconSetManager(iconset)
+            self.iconsets[iconset] = IconSetManager(iconset, download.result())
+
+    @staticmethod
+    def fetch(fetcher: Fetcher) -> Dict[IconSet, Future]:
+        """
+        Submits the file tree downloads of every iconset, without waiting for them
+        """
+        downloads = {}
+        for iconset in IconSet:
+            downloads[iconset] = IconSetManager.fetch(iconset, fetcher)
             break # TODO remove after testing
+        return downloads
 
     def get_iconset(self, iconset: Union[str, int, IconSet] = IconSet.POGO):
+        if self.__lazy:
+            self.__load_lazily()
         iconset = IconSet.match(iconset)
         return self.iconsets[iconset]
 
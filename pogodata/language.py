@@ -1,9 +1,12 @@
+from __future__ import annotations
 import re
 
 from enum import Enum
-from typing import Dict, Union, Optional
+from concurrent.futures import Future
+from typing import Dict, Union, Optional, List, Iterable
 
-from .misc import httpget, EnumMatcher
+from .misc import EnumMatcher
+from .fetch import Fetcher
 
 LOCALE_URL = "https://raw.githubusercontent.com/PokeMiners/pogo_assets/master/Texts/Latest%20APK/{}.txt"
 REMOTE_LOCALE_URL = "https://raw.githubusercontent.com/PokeMiners/pogo_assets/master/Texts/Latest%20Remote/{}.txt"
@@ -40,19 +43,35 @@ class Language(EnumMatcher):
 
 
 class LanguageManager:
-    def __init__(self):
+    def __init__(self, fetcher: Optional[Fetcher] = None):
         self.languages: Dict[str, Dict[str, str]] = {}
+        if fetcher is None:
+            with Fetcher() as fetcher:
+                self.__load(fetcher)
+        else:
+            self.__load(fetcher)
+
+    def __load(self, fetcher: Fetcher):
+        for lang, downloads in self.fetch(fetcher).items():
+            print(f"LanguageManager: Loading language files for {lang.value}")
+            self.languages[lang.value] = self.parse_locale(d.result().text for d in downloads)
+
+    @staticmethod
+    def fetch(fetcher: Fetcher) -> Dict[Language, List[Future]]:
+        """
+        Submits the APK and Remote locale downloads of every language, without waiting for them
+        """
+        downloads = {}
         for lang in Language:
-            self.languages[lang.value] = self.download_locale(lang)
+            downloads[lang] = [fetcher.get(url.format(lang.value)) for url in [LOCALE_URL, REMOTE_LOCALE_URL]]
             break #TODO remove after testing
+        return downloads
 
     @staticmethod
-    def download_locale(language: Language):
-        print(f"LanguageManager: Downloading language files for {language.value}")
+    def parse_locale(raws: Iterable[str]) -> Dict[str, str]:
         result = {}
 
-        for url in [LOCALE_URL, REMOTE_LOCALE_URL]:
-            raw = httpget(url.format(language.value)).text
+        for raw in raws:
             keys = re.findall(r"(?<=RESOURCE ID: ).*", raw)
             values = re.findall(r"(?<=TEXT: ).*", raw)
 
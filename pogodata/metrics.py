@@ -0,0 +1,139 @@
+import sys
+import json
+import time
+import tracemalloc
+
+from threading import Lock, local, get_ident
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _max_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes everywhere else
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name: str = name
+        self.wall_time: float = 0
+        self.bytes_fetched: int = 0
+        self.objects: int = 0
+        # highest traced allocation during this stage, in bytes. None for stages on other threads than
+        # the one tracing the reload (downloads), see ReloadStats
+        self.peak_memory: Optional[int] = None
+        self.max_rss: Optional[int] = None  # process high water mark at the end of this stage, in bytes
+
+    def __repr__(self):
+        return f"<StageStats {self.name} {round(self.wall_time, 3)}s>"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return vars(self).copy()
+
+
+class ReloadStats:
+    """
+    Wall time, downloaded bytes, created objects and memory of every stage of a reload.
+
+    trace_memory: record each stage's peak memory using tracemalloc. That's exact, but slows
+        down building considerably, so by default only the process' max RSS is recorded.
+        tracemalloc's peak is global to the process, so only stages on the thread running trace()
+        record it. Downloads on the fetcher's threads report None, while their allocations still count
+        towards the peak of the stages that are open on the tracing thread at the same time.
+    """
+    def __init__(self, trace_memory: bool = False):
+        self.stages: List[StageStats] = []
+        self.total_time: float = 0
+        self.trace_memory = trace_memory
+        # the thread inside trace(), the only one whose stages reset and read tracemalloc's peak
+        self.__tracing_thread: Optional[int] = None
+        self.__lock = Lock()
+        self.__local = local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_ReloadStats__lock"]
+        del state["_ReloadStats__local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = Lock()
+        self.__local = local()
+
+    def __getitem__(self, name: str) -> StageStats:
+        for stage in self.stages:
+            if stage.name == name:
+                return stage
+        raise KeyError(name)
+
+    def __stack(self) -> List[StageStats]:
+        if not hasattr(self.__local, "stack"):
+            self.__local.stack = []
+        return self.__local.stack
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        """
+        Times everything inside the with block. Stages can be nested, e.g. phases of building Pokemon.
+        Set bytes_fetched/objects on the yielded StageStats.
+        """
+        stats = StageStats(name)
+        stack = self.__stack()
+        tracing = self.trace_memory and self.__tracing_thread == get_ident() and tracemalloc.is_tracing()
+        if tracing:
+            peak = tracemalloc.get_traced_memory()[1]
+            for parent in stack:
+                parent.peak_memory = max(parent.peak_memory or 0, peak)
+            tracemalloc.reset_peak()
+
+        with self.__lock:
+            self.stages.append(stats)
+        stack.append(stats)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.wall_time = time.perf_counter() - start
+            stack.pop()
+            stats.max_rss = _max_rss()
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                for stage in stack + [stats]:
+                    stage.peak_memory = max(stage.peak_memory or 0, peak)
+
+    @contextmanager
+    def trace(self) -> Iterator["ReloadStats"]:
+        """
+        Times the whole reload and starts tracemalloc for it, if trace_memory is set
+        """
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        self.__tracing_thread = get_ident()
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_time = time.perf_counter() - start
+            self.__tracing_thread = None
+            if started_tracing:
+                tracemalloc.stop()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_time": self.total_time,
+            "bytes_fetched": sum(s.bytes_fetched for s in self.stages if s.name.startswith("download:")),
+            "stages": [s.to_dict() for s in self.stages]
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
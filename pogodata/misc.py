@@ -1,8 +1,12 @@
+from __future__ import annotations
 import requests
 import time
 from enum import Enum
 from datetime import datetime
-from typing import Union, Any
+from typing import Union, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cache import HttpCache
 
 INFO_URL = "https://raw.githubusercontent.com/ccev/pogoinfo/v2/"
 PROTO_URL = "https://raw.githubusercontent.com/Furtif/POGOProtos/master/base/vbase.proto"
@@ -26,11 +30,14 @@ class EnumMatcher(Enum):
         return type_
 
 
-def httpget(url):
+def httpget(url, cache: Optional[HttpCache] = None, immutable: bool = False, stream: bool = False):
+    if cache is not None:
+        return cache.get(url, immutable=immutable, stream=stream)
+
     result = None
     while not result:
         try:
-            result = requests.get(url)
+            result = requests.get(url, stream=stream)
         except Exception:
             pass
         if not result:
@@ -68,11 +75,12 @@ def match_enum(enum: Enum, value: Any) -> Enum:
     return type_
 
 
-def get_repo_content(repo_url, sha_url):
-    master = httpget(sha_url).json()
+def get_repo_content(repo_url, sha_url, cache: Optional[HttpCache] = None):
+    master = httpget(sha_url, cache).json()
     sha = master["commit"]["sha"]
     new_url = repo_url.format(sha=sha)
-    icons = httpget(new_url).json()["tree"]
+    # trees are addressed by their commit SHA, so a cached one never needs revalidation
+    icons = httpget(new_url, cache, immutable=True).json()["tree"]
     icons = [i["path"] for i in icons]
     return icons
 
@@ -6,8 +6,24 @@ from .gameobject import GameObject
 from .language import Language
 from .type import Type
 
+GAMEMASTER_SETTINGS = ("moveSettings", "combatMove")
+
 
 class Move(GameObject):
+    __slots__ = ("type", "pve", "pvp")
+    QUERY_SCHEMA = {
+        "move": QueryType.customenum,
+        "name": QueryType.qlist,
+        "type": QueryType.customenum,
+        "pve_power": QueryType.qint,
+        "pve_energy_delta": QueryType.qint,
+        "pve_duration": QueryType.qint,
+        "pve_window_start": QueryType.qint,
+        "pve_window_end": QueryType.qint,
+        "pvp_power": QueryType.qint,
+        "pvp_energy_delta": QueryType.qint
+    }
+
     def __init__(self, icon_manager: IconManager, pve_entry: dict, pvp_entry: dict, proto):
         super().__init__(icon_manager, {**pve_entry, **pvp_entry})
 
@@ -26,25 +42,31 @@ class Move(GameObject):
         }
         self.pvp = {
             "power": pvp_entry.get("power", 0.0),
-            "energy_delta": pvp_entry.get("energyDelta", 0)
+            "energy_delta": pvp_entry.get("energyDelta", 0),
+            # fast moves take durationTurns extra turns, charged moves one
+            "turns": pvp_entry.get("durationTurns", 0) + 1
         }
 
         self.query = {
-            "move": (QueryType.customenum, self.proto),
-            "name": (QueryType.qlist, self.names),
-            "type": (QueryType.customenum, self.type.proto),
-            "pve_power": (QueryType.qint, self.pve["power"]),
-            "pve_energy_delta": (QueryType.qint, self.pve["energy_delta"]),
-            "pve_duration": (QueryType.qint, self.pve["duration"]),
-            "pve_window_start": (QueryType.qint, self.pve["window"]["start"]),
-            "pve_window_end": (QueryType.qint, self.pve["window"]["end"]),
-            "pvp_power": (QueryType.qint, self.pvp["power"]),
-            "pvp_energy_delta": (QueryType.qint, self.pvp["energy_delta"])
+            "move": self.proto,
+            "name": self.names,
+            "type": self.type.proto,
+            "pve_power": self.pve["power"],
+            "pve_energy_delta": self.pve["energy_delta"],
+            "pve_duration": self.pve["duration"],
+            "pve_window_start": self.pve["window"]["start"],
+            "pve_window_end": self.pve["window"]["end"],
+            "pvp_power": self.pvp["power"],
+            "pvp_energy_delta": self.pvp["energy_delta"]
         }
 
+    @property
+    def fast(self) -> bool:
+        return self.proto.tmpl.endswith("_FAST")
+
     def get_base(self) -> Dict[str, Any]:
         return {
-            **vars(self.proto),
+            **self.proto.to_dict(),
             "type": self.type.get_base()
         }
 
@@ -1,137 +1,342 @@
-import re
 import time
 
-from datetime import datetime
-from typing import List, Union, Optional, Dict, Any, Tuple
-
-from enum import Enum
-from .misc import httpget, PROTO_URL, GAMEMASTER_URL, INFO_URL, EnumMatcher
-from .pokemon import _make_mon_list, Pokemon
-from .type import _make_type_list, Type
-#from .event import _make_event_list, Event
-#from .item import _make_item_list, Item
-#from .grunt import _make_grunt_list, Grunt
-#from .raid import _make_raid_list
-from .move import _make_move_list, Move
-from .weather import _make_weather_list, Weather
-#from .quest import _make_quest_list, Quest
+from array import array
+from threading import Thread, Lock
+from itertools import islice
+from typing import List, Optional, Dict, Tuple, Sequence, Callable, Any, Iterator, Union
+
+from .misc import EnumMatcher
+from .pokemon import Pokemon
+from .type import Type, TypeChart
+from .move import Move
+from .weather import Weather
 from .icons import IconManager
-from .language import LanguageManager
-from .custom_types import DefaultEnum
+from .language import LanguageManager, Language
+from .cache import HttpCache
+from .snapshot import Snapshot
+from .query import QueryCache, Page
+from .pvp import RankTables, LeagueRank
+from .dps import MovesetTable, Moveset
+from .metrics import ReloadStats
+from .artifact import dump_snapshot, load_snapshot
+from .errors import PogoDataException, InvalidQueryArgument, RawDataDropped
 
 
 class PogoData:
-    types: List[Type] = []
-    weather: List[Weather] = []
-    moves: List[Move] = []
-    mons: List[Pokemon] = []
+    cache: Optional[HttpCache] = None
 
-    language_manager = None
-    icon_manager = None
+    def __init__(self,
+                 cache_dir: Optional[str] = None,
+                 offline: bool = False,
+                 max_workers: int = 8,
+                 stream_gamemaster: bool = False,
+                 keep_raw: bool = True,
+                 trace_memory: bool = False,
+                 artifact: Optional[str] = None,
+                 lazy: bool = False,
+                 query_cache_size: int = 0,
+                 query_cache_ttl: Optional[float] = None,
+                 pvp_workers: Optional[int] = 0,
+                 dps_workers: Optional[int] = 0):
+        """
+        cache_dir: directory to keep downloaded protos, GameMaster, locales and icon trees in.
+            They're revalidated on reload and used as a fallback if GitHub can't be reached.
+        offline: only load data from cache_dir, without making any requests
+        max_workers: how many downloads may run at the same time
+        stream_gamemaster: parse the GameMaster while it's downloaded and only keep what's needed.
+            raw_gamemaster and get_gamemaster for any other settings then raise RawDataDropped.
+        keep_raw: keep raw protos, GameMaster and GameObject.raw after building. Without them, raw_protos,
+            raw_gamemaster, get_gamemaster and GameObject.raw raise RawDataDropped.
+            Turning this off (together with stream_gamemaster) keeps peak memory during reloads low.
+        trace_memory: record the peak memory of every reload stage in stats (slows down reloads)
+        artifact: load prebuilt data from this file (see save_artifact and `python -m pogodata build`)
+            instead of downloading and building it. Reloads read the file again.
+        lazy: only build types, weather, moves or Pokemon (and what they depend on) once they're first
+            used. Icon file trees are downloaded on the first icon lookup.
+        query_cache_size: keep the results of this many get_mons/get_moves/get_types/get_weather queries.
+            The cache is cleared on every reload; its hit/miss counters are in query_cache.to_dict()
+        query_cache_ttl: seconds a cached query result stays valid
+        pvp_workers: processes to build PvP rank tables in (see get_pvp_rank and RankTables).
+            0 builds them in the thread that first needs them, None starts one process per CPU
+        dps_workers: processes to calculate moveset tables in (see get_movesets and MovesetTable), like pvp_workers
+        """
+        self.max_workers = max_workers
+        self.stream_gamemaster = stream_gamemaster
+        self.keep_raw = keep_raw
+        self.trace_memory = trace_memory
+        self.artifact = artifact
+        self.lazy = lazy
+        self.pvp_workers = pvp_workers
+        self.dps_workers = dps_workers
+        if cache_dir:
+            self.cache = HttpCache(cache_dir, offline=offline)
+        elif offline:
+            raise PogoDataException("Running offline requires a cache_dir")
 
-    __cached_enums: Dict[str, Dict[str, int]] = {}
-    raw_protos: str = ""
-    raw_gamemaster: List[Dict] = []
+        self.query_cache: Optional[QueryCache] = None
+        if query_cache_size > 0:
+            self.query_cache = QueryCache(query_cache_size, query_cache_ttl)
 
-    def __init__(self):
+        self.snapshot: Optional[Snapshot] = None
+        self.__reload_lock = Lock()
         self.reload()
 
-    def reload(self):
-        start = time.time()
-        self.language_manager = LanguageManager()
-        self.icon_manager = IconManager()
+    def reload(self, background: bool = False) -> Optional[Thread]:
+        """
+        Builds a completely new Snapshot and swaps it in once it's done. Until then, all queries
+        are answered by the previous snapshot.
+
+        background: build the new snapshot in a separate thread and return that thread
+        """
+        if background:
+            thread = Thread(target=self.reload, name="pogodata-reload", daemon=True)
+            thread.start()
+            return thread
+
+        with self.__reload_lock:
+            start = time.time()
+            if self.artifact:
+                snapshot = load_snapshot(self.artifact)
+            else:
+                snapshot = Snapshot(self.cache, self.max_workers, self.stream_gamemaster, self.keep_raw,
+                                    self.trace_memory, self.lazy)
+            self.snapshot = snapshot
+            if self.query_cache is not None:
+                self.query_cache.clear()
+            print(f"It took {round(time.time()-start, 2)}s to reload PogoData")
+
+    def save_artifact(self, path: str):
+        """
+        Saves the current data to a versioned binary file, which can be loaded using PogoData(artifact=path)
+        """
+        dump_snapshot(self.snapshot, path)
+
+    @property
+    def types(self) -> Sequence[Type]:
+        return self.snapshot.types
+
+    @property
+    def weather(self) -> Sequence[Weather]:
+        return self.snapshot.weather
+
+    @property
+    def moves(self) -> Sequence[Move]:
+        return self.snapshot.moves
+
+    @property
+    def mons(self) -> Sequence[Pokemon]:
+        return self.snapshot.mons
+
+    @property
+    def stats(self) -> ReloadStats:
+        """
+        Per-stage timings of the reload that built the current data. Use stats.to_json() to export them.
+        """
+        return self.snapshot.stats
 
-        self.__cached_enums = {}
+    @property
+    def language_manager(self) -> LanguageManager:
+        return self.snapshot.language_manager
 
-        print("Downloading latest Protos")
-        self.raw_protos = httpget(PROTO_URL).text
+    @property
+    def icon_manager(self) -> IconManager:
+        return self.snapshot.icon_manager
 
-        print("Downloading latest GameMaster")
-        self.raw_gamemaster = httpget(GAMEMASTER_URL).json()
+    @property
+    def raw_protos(self) -> str:
+        snapshot = self.snapshot
+        if snapshot.raw_dropped:
+            raise RawDataDropped("raw_protos")
+        return snapshot.raw_protos
 
-        _make_type_list(self)
-        #_make_item_list(self)
-        _make_weather_list(self)
-        _make_move_list(self)
-        _make_mon_list(self)
-        #_make_quest_list(self)
-        #_make_raid_list(self)
-        #_make_grunt_list(self)
-        #_make_event_list(self)
+    @property
+    def raw_gamemaster(self) -> List[Dict]:
+        snapshot = self.snapshot
+        if snapshot.raw_dropped:
+            raise RawDataDropped("raw_gamemaster")
+        if snapshot.gamemaster_streamed:
+            raise RawDataDropped("raw_gamemaster", streamed=True)
+        return snapshot.raw_gamemaster
 
-        print(f"It took {round(time.time()-start, 2)}s to reload PogoData")
+    # Every query reads self.snapshot exactly once, so it's answered by a single snapshot
+    # even if a reload swaps in a new one at the same time
 
     @staticmethod
-    def __get_object(obj_list: List[Any], **kwargs) -> List[Any]:
-        result = []
-        for obj in obj_list:
-            if obj.compare(**kwargs):
-                result.append(obj)
-        return result
+    def __paginate(matches: Iterator[Tuple[int, Any]],
+                   limit: Optional[int],
+                   offset: int) -> Page:
+        # one more than needed tells whether there's a next page
+        end = None if limit is None else offset + limit + 1
+        found = list(islice(matches, offset, end))
+        next_cursor = None
+        if limit is not None and len(found) > limit:
+            found = found[:limit]
+            if found:
+                next_cursor = str(found[-1][0] + 1)
+        return Page((obj for _, obj in found), next_cursor)
 
-    def get_mons(self, **kwargs) -> List[Pokemon]:
-        result = self.__get_object(self.mons, **kwargs)
-        return result
+    def __query(self,
+                category: str,
+                schema: Dict[str, Callable],
+                kwargs: Dict[str, Any],
+                limit: Optional[int],
+                offset: int,
+                cursor: Union[str, int, None]) -> Page:
+        try:
+            limit = None if limit is None else int(limit)
+            offset = int(offset)
+            start = int(cursor) if cursor is not None else 0
+        except (TypeError, ValueError):
+            raise InvalidQueryArgument(f"limit={limit}, offset={offset}, cursor={cursor}")
+        if (limit is not None and limit < 0) or offset < 0 or start < 0:
+            raise InvalidQueryArgument(f"limit={limit}, offset={offset}, cursor={cursor}")
 
-    def get_types(self, **kwargs) -> List[Type]:
-        result = self.__get_object(self.types, **kwargs)
-        return result
+        key = None
+        if self.query_cache is not None:
+            key = self.query_cache.key(category, schema, kwargs, limit, offset, start)
+            if key is not None:
+                result = self.query_cache.get(key)
+                if result is not None:
+                    return result
 
-    def get_weather(self, **kwargs) -> List[Weather]:
-        result = self.__get_object(self.weather, **kwargs)
-        return result
+            # read before the snapshot, so a reload in between can't leave its old results in the cache
+            generation = self.query_cache.generation
+
+        snapshot = self.snapshot
+        if limit is None and not offset and not start:
+            result = Page(getattr(snapshot, "get_" + category)(**kwargs))
+        else:
+            result = self.__paginate(snapshot.iter_objects(category, start, **kwargs), limit, offset)
 
-    def get_moves(self, **kwargs) -> List[Move]:
-        result = self.__get_object(self.moves, **kwargs)
+        if key is not None:
+            self.query_cache.put(key, result, generation)
         return result
 
-    # TODO all get_xxx methods
+    # limit: return at most this many objects. If there are more, the result's next_cursor is set
+    # offset: skip this many matches
+    # cursor: continue after the last page, using its next_cursor. Cursors are only valid until the next reload
 
-    def get_enum(self, enum: str, message: Optional[str] = None, remove: Optional[str] = None) -> EnumMatcher:
-        cache_key = str(message).lower() + ":" + enum.lower()
-        cached = self.__cached_enums.get(cache_key)
-        if cached:
-            final = cached
-        else:
-            if message is not None:
-                protos = re.findall(f"message {message}" + r"[^ß]*?message", self.raw_protos, re.IGNORECASE)
-                # sorry
+    def get_mons(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                 **kwargs) -> Page:
+        return self.__query("mons", Pokemon.QUERY_SCHEMA, kwargs, limit, offset, cursor)
 
-                if len(protos) == 0:
-                    return DefaultEnum(0)
-                protos = protos[0]
-            else:
-                protos = self.raw_protos
+    def get_types(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                  **kwargs) -> Page:
+        return self.__query("types", Type.QUERY_SCHEMA, kwargs, limit, offset, cursor)
 
-            proto = re.findall(f"enum {enum} "+r"{[^}]*}", protos, re.IGNORECASE)
-            if len(proto) == 0:
-                return DefaultEnum(0)
+    def get_weather(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                    **kwargs) -> Page:
+        return self.__query("weather", Weather.QUERY_SCHEMA, kwargs, limit, offset, cursor)
 
-            final = {}
-            for entry in proto[0].split("\n"):
-                if "}" in entry or "{" in entry:
-                    continue
-                k: str = entry.split(" =")[0].strip()
-                v: int = int(entry.split("= ")[1].split(";")[0].strip())
-                if remove:
-                    k = k.replace(remove, "")
-                final[k] = v
+    def get_moves(self, limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None,
+                  **kwargs) -> Page:
+        return self.__query("moves", Move.QUERY_SCHEMA, kwargs, limit, offset, cursor)
 
-            final = EnumMatcher(enum, final)
-            self.__cached_enums[cache_key] = final
+    # iter_xxx: like get_xxx, but objects are only matched as they're consumed, e.g. to stop after the first few
 
-        return final
+    def iter_mons(self, **kwargs) -> Iterator[Pokemon]:
+        return (obj for _, obj in self.snapshot.iter_objects("mons", **kwargs))
+
+    def iter_types(self, **kwargs) -> Iterator[Type]:
+        return (obj for _, obj in self.snapshot.iter_objects("types", **kwargs))
+
+    def iter_weather(self, **kwargs) -> Iterator[Weather]:
+        return (obj for _, obj in self.snapshot.iter_objects("weather", **kwargs))
+
+    def iter_moves(self, **kwargs) -> Iterator[Move]:
+        return (obj for _, obj in self.snapshot.iter_objects("moves", **kwargs))
+
+    def get_rank_tables(self) -> RankTables:
+        """
+        PvP rank tables of all Pokemon. They're built the first time they're needed after a reload
+        and kept in cache_dir, where they're reused as long as no base stats change.
+        """
+        directory = self.cache.directory if self.cache else None
+        return self.snapshot.get_rank_tables(directory, self.pvp_workers)
+
+    def get_pvp_rank(self, mon: Pokemon, ivs: Sequence[int], league: str = "great", level_cap: int = 50) -> LeagueRank:
+        """
+        Where mon with these IVs (attack, defense, stamina) ranks in a league ("little", "great" or "ultra")
+        under a level cap (40, 41, 50 or 51)
+        """
+        return self.get_rank_tables().rank(mon, ivs, league, level_cap)
+
+    def get_type_chart(self) -> TypeChart:
+        """
+        Damage multipliers (1.6, 0.625 and 0.390625) of every attacking type against every type and
+        every type combination of Pokemon
+        """
+        return self.snapshot.get_type_chart()
+
+    def matchup(self, attack_types: Sequence[Union[Type, int, str]], defenders: Sequence[Any]) -> array:
+        """
+        Multipliers of every attacking type (Types, type ids or templates) against every defender
+        (Pokemon, types or lists of types), as one flat array with a row of len(defenders) values
+        per attacking type: result[attacker * len(defenders) + defender]
+        """
+        return self.get_type_chart().matchup(attack_types, defenders)
+
+    def get_moveset_table(self, weather: Optional[Weather] = None) -> MovesetTable:
+        """
+        DPS, TDO and PvP stats of every fast and charged move combination of every Pokemon,
+        with moves boosted by weather. Tables are calculated once per weather after a reload.
+        """
+        return self.snapshot.get_moveset_table(weather, self.dps_workers)
+
+    def get_movesets(self,
+                     mon: Optional[Pokemon] = None,
+                     weather: Optional[Weather] = None,
+                     key: str = "dps",
+                     limit: Optional[int] = None) -> List[Moveset]:
+        """
+        Movesets of mon (or of all Pokemon), sorted by key: "dps", "tdo", "dpt", "ept" or "dpe"
+        """
+        return self.get_moveset_table(weather).best(mon, key, limit)
+
+    def get_evolution_family(self, mon: Pokemon) -> Tuple[Pokemon, ...]:
+        """
+        mon and every Pokemon it's connected to by evolutions or temp evolutions, in the order of mons
+        (e.g. Bulbasaur, Ivysaur, Venusaur and Mega Venusaur). mon has to be from the current data.
+        """
+        return self.snapshot.get_evolution_family(mon)
+
+    def get_pre_evolutions(self, mon: Pokemon) -> List[Pokemon]:
+        """
+        The Pokemon that evolve into mon in one step
+        """
+        return self.snapshot.get_pre_evolutions(mon)
+
+    # TODO all get_xxx methods
+
+    def search(self,
+               name: str,
+               language: Union[str, Language, None] = None,
+               kind: Optional[str] = None,
+               limit: int = 10) -> List[Any]:
+        """
+        Finds objects by a full, partial or misspelled name, ignoring case, accents and punctuation.
+        Exact names come first, then names starting with it, then names with typos.
+
+        language: only match names in this language, by default all loaded languages are searched
+        kind: only search one category: "types", "weather", "moves" or "mons"
+        """
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise InvalidQueryArgument(f"limit={limit}")
+        if limit < 0:
+            raise InvalidQueryArgument(f"limit={limit}")
+        return self.snapshot.search(name, language, kind, limit)
+
+    def get_column(self, category: str, key: str) -> array:
+        """
+        All values of a numeric query field (e.g. "mons", "weight") in the order of that category's objects,
+        NaN where an object has no value. Useful for statistics over all objects without touching them.
+        """
+        return self.snapshot.get_column(category, key)
+
+    def get_enum(self, enum: str, message: Optional[str] = None, remove: Optional[str] = None) -> EnumMatcher:
+        return self.snapshot.get_enum(enum, message, remove)
 
     def get_gamemaster(self, pattern: str, settings: Optional[str] = None) -> List[Tuple[str, Dict]]:
-        result = []
-        for entry in self.raw_gamemaster:
-            templateid = entry.get("templateId", "")
-            if re.search(pattern, templateid):
-                data = entry.get("data", {})
-                if settings:
-                    data = data.get(settings, {})
-
-                result.append((
-                    templateid, data
-                ))
-        return result
+        return self.snapshot.get_gamemaster(pattern, settings)
@@ -1,19 +1,23 @@
 import re
 
 from enum import Enum
-from math import floor
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Tuple, Sequence, Optional, Set, Iterable
 
-from .misc import CP_MULTIPLIERS, get_repo_content, INGAME_ICONS, ICON_SHA
+from .misc import INGAME_ICONS, ICON_SHA
 from .custom_types import CustomEnum, QueryType
 from .icons import IconSet, IconManager
-from .gameobject import GameObject, BaseGameObject
+from .gameobject import GameObject, BaseGameObject, slot_names
 from .language import Language
 from .move import Move
+from .cp import calculate_cp, calculate_hp, find_stats, Level, MIN_LEVEL, MAX_LEVEL
 from .type import Type
 
 
 GENERATION_MAXES = [0, 151, 251, 386, 493, 649, 721, 809, 898]
+ICON_PREFIX = "Images/Pokemon/pokemon_icon_"
+# dex, asset value, costume, shiny
+ICON_REGEX = re.compile(r"Images/Pokemon/pokemon_icon_(\d{3})_(\d+)(?:_(\d+))?(_shiny)?\.png$")
+GAMEMASTER_SETTINGS = ("pokemonSettings", "formSettings", "genderSettings", "temporaryEvolutionSettings")
 
 
 class Generation(Enum):
@@ -37,6 +41,39 @@ class PokemonType(Enum):
 
 
 class Pokemon(GameObject):
+    __slots__ = ("form_names", "shiny", "pokemon_type", "form", "costume", "temp_evolution", "rarity", "generation",
+                 "moves", "elite_moves", "types", "evolutions", "temp_evolutions", "base_stats", "assets", "info",
+                 "male_ratio", "female_ratio", "genderless_ratio",
+                 "_has_female_asset", "_asset_suffix", "_asset_value")
+    _SHARED_FIELDS = ("raw", "names", "form_names")
+    QUERY_SCHEMA = {
+        "id": QueryType.string,
+        "pokemon": QueryType.customenum,
+        "name": QueryType.qlist,
+        "form_name": QueryType.qlist,
+        "shiny": QueryType.qint,
+        "generation": QueryType.customenum,
+        "form": QueryType.customenum,
+        "costume": QueryType.customenum,
+        "temp_evolution": QueryType.customenum,
+        "assets": QueryType.qlist,
+        "rarity": QueryType.customenum,
+        "bonus_stardust": QueryType.qint,
+        "bonus_candy": QueryType.qint,
+        "bonus_xl": QueryType.qint,
+        "deployable": QueryType.bool_,
+        "tradable": QueryType.bool_,
+        "transferable": QueryType.bool_,
+        "buddy_distance": QueryType.qfloat,
+        "weight": QueryType.qfloat,
+        "height": QueryType.qfloat,
+        "male_ratio": QueryType.qfloat,
+        "female_ratio": QueryType.qfloat,
+        "genderless_ratio": QueryType.qfloat,
+        "base_capture_rate": QueryType.qfloat,
+        "flee_rate": QueryType.qfloat
+    }
+
     def __init__(self, icon_manager: IconManager, gamemaster_entry: dict):
         super().__init__(icon_manager, gamemaster_entry)
 
@@ -84,11 +121,11 @@ class Pokemon(GameObject):
             "id": self.id,
             "shiny": 0,
             "pokemon_type": self.pokemon_type.name.lower(),
-            "generation": vars(self.generation),
-            "pokemon": vars(self.proto),
-            "form": vars(self.form),
-            "costume": vars(self.costume),
-            "temp_evolution": vars(self.temp_evolution),
+            "generation": self.generation.to_dict(),
+            "pokemon": self.proto.to_dict(),
+            "form": self.form.to_dict(),
+            "costume": self.costume.to_dict(),
+            "temp_evolution": self.temp_evolution.to_dict(),
         }
 
     def get_full(self,
@@ -131,12 +168,21 @@ class Pokemon(GameObject):
         self.id = str(self.proto.id) + self.__id_part(self.form) + self.__id_part(self.costume) \
                       + self.__id_part(self.temp_evolution)
 
-    def calculate_cp(self, level, ivs):
-        multiplier = CP_MULTIPLIERS.get(level, 0.5)
-        attack = self.base_stats[0] + ivs[0]
-        defense = self.base_stats[1] + ivs[1]
-        stamina = self.base_stats[2] + ivs[2]
-        return floor((attack * defense**0.5 * stamina**0.5 * multiplier**2) / 10)
+    def calculate_cp(self, level: Level, ivs: Sequence[int]) -> int:
+        """
+        Raises InvalidLevel for levels that don't exist. See pogodata.cp for calculating many at once.
+        """
+        return calculate_cp(self.base_stats, level, ivs)
+
+    def calculate_hp(self, level: Level, ivs: Sequence[int]) -> int:
+        return calculate_hp(self.base_stats, level, ivs)
+
+    def find_stats(self, cp: int, min_level: Level = MIN_LEVEL,
+                   max_level: Level = MAX_LEVEL) -> List[Tuple[float, Tuple[int, int, int]]]:
+        """
+        Every (level, IVs) this Pokemon can have at this CP
+        """
+        return find_stats(self, cp, min_level, max_level)
 
     def get_gender_asset(self, gender: int = 0):
         asset = "pokemon_icon_"
@@ -168,7 +214,7 @@ class Pokemon(GameObject):
     def make_info(self):
         raw_encounter: dict = self.raw.get("encounter", {})
 
-        self.info["rarity"]: str = vars(self.rarity)
+        self.info["rarity"]: str = self.rarity.to_dict()
 
         self.info["bonus_stardust"]: int = raw_encounter.get("bonusStardustCaptureReward", 0)
         self.info["bonus_candy"]: int = raw_encounter.get("bonusCandyCaptureReward", 0)
@@ -208,47 +254,50 @@ class Pokemon(GameObject):
 
     def make_query(self):
         self.query = {
-            "id": (QueryType.string, self.id),
-            "pokemon": (QueryType.customenum, self.proto),
-            "name": (QueryType.qlist, self.names),
-            "form_name": (QueryType.qlist, self.form_names),
-            "shiny": (QueryType.qint, self.shiny),
-            "generation": (QueryType.customenum, self.generation),
-            "form": (QueryType.customenum, self.form),
-            "costume": (QueryType.customenum, self.costume),
-            "temp_evolution": (QueryType.customenum, self.temp_evolution),
-            "assets": (QueryType.qlist, self.assets),
-            "rarity": (QueryType.customenum, self.rarity),
-            "bonus_stardust": (QueryType.qint, self.info["bonus_stardust"]),
-            "bonus_candy": (QueryType.qint, self.info["bonus_candy"]),
-            "bonus_xl": (QueryType.qint, self.info["bonus_xl"]),
-            "deployable": (QueryType.bool_, self.info["deployable"]),
-            "tradable": (QueryType.bool_, self.info["tradable"]),
-            "transferable": (QueryType.bool_, self.info["transferable"]),
-            "buddy_distance": (QueryType.qfloat, self.info["buddy_distance"]),
-            "weight": (QueryType.qfloat, self.info["weight"]),
-            "height": (QueryType.qfloat, self.info["height"]),
-            "male_ratio": (QueryType.qfloat, self.male_ratio),
-            "female_ratio": (QueryType.qfloat, self.female_ratio),
-            "genderless_ratio": (QueryType.qfloat, self.genderless_ratio),
-            "base_capture_rate": (QueryType.qfloat, self.info["encounter"]["base_capture_rate"]),
-            "flee_rate": (QueryType.qfloat, self.info["encounter"]["flee_rate"])
+            "id": self.id,
+            "pokemon": self.proto,
+            "name": self.names,
+            "form_name": self.form_names,
+            "shiny": self.shiny,
+            "generation": self.generation,
+            "form": self.form,
+            "costume": self.costume,
+            "temp_evolution": self.temp_evolution,
+            "assets": self.assets,
+            "rarity": self.rarity,
+            "bonus_stardust": self.info["bonus_stardust"],
+            "bonus_candy": self.info["bonus_candy"],
+            "bonus_xl": self.info["bonus_xl"],
+            "deployable": self.info["deployable"],
+            "tradable": self.info["tradable"],
+            "transferable": self.info["transferable"],
+            "buddy_distance": self.info["buddy_distance"],
+            "weight": self.info["weight"],
+            "height": self.info["height"],
+            "male_ratio": self.male_ratio,
+            "female_ratio": self.female_ratio,
+            "genderless_ratio": self.genderless_ratio,
+            "base_capture_rate": self.info["encounter"]["base_capture_rate"],
+            "flee_rate": self.info["encounter"]["flee_rate"]
         }
 
 
 class _BaseEvolution(BaseGameObject):
+    __slots__ = ("into",)
+
     def __init__(self, pokemon: Pokemon):
         super().__init__()
         self.into: Pokemon = pokemon
 
     def get_base(self):
-        base = vars(self).copy()
-        base.pop("into")
+        base = {key: getattr(self, key) for key in slot_names(type(self)) if key != "into"}
         base["into"] = self.into.get_base()
         return base
 
 
 class Evolution(_BaseEvolution):
+    __slots__ = ("candy", "quest")
+
     def __init__(self, pokemon: Pokemon, candy: int = 0, quest: Any = None):
         super().__init__(pokemon)
         self.candy: int = candy
@@ -256,43 +305,177 @@ class Evolution(_BaseEvolution):
 
 
 class TempEvolution(_BaseEvolution):
+    __slots__ = ("energy_initial", "energy_subsequent")
+
     def __init__(self, pokemon: Pokemon, energy_initial: int = 0, energy_subsequent: int = 0):
         super().__init__(pokemon)
         self.energy_initial: int = energy_initial
         self.energy_subsequent: int = energy_subsequent
 
 
-def __typing(pogodata, mon: Pokemon, type1ref: str, type2ref: str):
+class EvolutionGraph:
+    """
+    Which Pokemon evolve into which, built once per snapshot. Pokemon are looked up by identity,
+    so they have to be from the same snapshot.
+
+    forward: the evolutions of a Pokemon that take one step
+    reverse: the Pokemon that evolve into a Pokemon in one step
+    """
+    def __init__(self):
+        self.forward: Dict[Pokemon, List[Evolution]] = {}
+        self.reverse: Dict[Pokemon, List[Pokemon]] = {}
+        self.__chains: Dict[Pokemon, Tuple[Evolution, ...]] = {}
+        self.__families: Dict[Pokemon, Tuple[Pokemon, ...]] = {}
+
+    def add(self, mon: Pokemon, evolutions: List[Evolution]):
+        self.forward[mon] = evolutions
+        for evolution in evolutions:
+            self.reverse.setdefault(evolution.into, []).append(mon)
+
+    def chain(self, mon: Pokemon) -> Tuple[Evolution, ...]:
+        """
+        Every evolution of a Pokemon, each step followed by the evolutions of its result.
+        Evolutions of shared branches (e.g. Eevee's) are only collected once.
+        """
+        chain = self.__chains.get(mon)
+        if chain is None:
+            # a cycle in the GameMaster ends the chain instead of recursing forever
+            self.__chains[mon] = ()
+            chain = []
+            for evolution in self.forward.get(mon, []):
+                chain.append(evolution)
+                chain += self.chain(evolution.into)
+            chain = self.__chains[mon] = tuple(chain)
+        return chain
+
+    def evolves_from(self, mon: Pokemon) -> List[Pokemon]:
+        return self.reverse.get(mon, [])
+
+    def make_families(self, mons: Sequence[Pokemon]):
+        """
+        Groups mons into families: all Pokemon connected by evolutions or temp evolutions,
+        in the order of mons
+        """
+        neighbours: Dict[Pokemon, List[Pokemon]] = {}
+        for mon in mons:
+            for other in [e.into for e in self.forward.get(mon, [])] + [e.into for e in mon.temp_evolutions]:
+                neighbours.setdefault(mon, []).append(other)
+                neighbours.setdefault(other, []).append(mon)
+
+        positions = {mon: position for position, mon in enumerate(mons)}
+        self.__families = {}
+        for mon in mons:
+            if mon in self.__families:
+                continue
+            members = {mon}
+            queue = [mon]
+            while queue:
+                for other in neighbours.get(queue.pop(), []):
+                    if other not in members:
+                        members.add(other)
+                        queue.append(other)
+            family = tuple(sorted(members, key=lambda member: positions.get(member, len(mons))))
+            for member in family:
+                self.__families[member] = family
+
+    def family(self, mon: Pokemon) -> Tuple[Pokemon, ...]:
+        return self.__families.get(mon, (mon,))
+
+
+class _MonRegistry:
+    """
+    Pokemon created so far, keyed the way _make_mon_list looks them up. Every list keeps the order
+    Pokemon were added in, so its first entry is the one get_mons() would have found first.
+    """
+    def __init__(self):
+        self.by_proto: Dict[str, List[Pokemon]] = {}
+        self.by_form: Dict[str, List[Pokemon]] = {}
+        self.by_temp_evolution: Dict[Tuple[str, str], List[Pokemon]] = {}
+        self.by_asset: Dict[str, List[Pokemon]] = {}
+
+    def add(self, mon: Pokemon):
+        self.by_proto.setdefault(mon.proto.tmpl, []).append(mon)
+        self.by_form.setdefault(mon.form.tmpl, []).append(mon)
+        self.by_temp_evolution.setdefault((mon.proto.tmpl, mon.temp_evolution.tmpl), []).append(mon)
+
+    def add_assets(self, mon: Pokemon):
+        # assets change until the costume pass, so they're only registered from then on
+        for asset in dict.fromkeys(mon.query["assets"]):
+            self.by_asset.setdefault(asset, []).append(mon)
+
+    def proto(self, template: str) -> List[Pokemon]:
+        return self.by_proto.get(template, [])
+
+    def form(self, template: str) -> List[Pokemon]:
+        return self.by_form.get(template, [])
+
+    def temp_evolution(self, proto_template: str, temp_evolution_template: str) -> List[Pokemon]:
+        return self.by_temp_evolution.get((proto_template, temp_evolution_template), [])
+
+    def asset(self, asset: str) -> List[Pokemon]:
+        return self.by_asset.get(asset, [])
+
+
+def _first_by_template(objects: Sequence[GameObject]) -> Dict[str, GameObject]:
+    result = {}
+    for obj in objects:
+        result.setdefault(obj.proto.tmpl, obj)
+    return result
+
+
+def __typing(types: Dict[str, Type], mon: Pokemon, type1ref: str, type2ref: str):
     # makes Pokemon types
     typings = [mon.raw.get(type1ref), mon.raw.get(type2ref)]
     for typing in typings:
         if typing:
-            mon.types.append(pogodata.get_types(type=typing)[0])
+            mon.types.append(types[typing])
 
 
-def __append_evolution(pogodata, mon: Pokemon, to_append: list):
-    # adds evolutions to Pokemon.evolutions
-    evolutions = mon.raw.get("evolutionBranch", [])
-    for evo_raw in evolutions:
+def __direct_evolutions(registry: _MonRegistry, mon: Pokemon) -> List[Evolution]:
+    # the Pokemon mon evolves into in one step
+    evolutions = []
+    for evo_raw in mon.raw.get("evolutionBranch", []):
         if "temporaryEvolution" in evo_raw:
             continue
         form: str = evo_raw.get("form")
         candy: int = evo_raw.get("candyCost", 0)
         # TODO evolution quests
         if not form:
-            evo = pogodata.get_mons(pokemon=evo_raw["evolution"])[0]
+            evo = registry.proto(evo_raw["evolution"])[0]
         else:
-            evo = pogodata.get_mons(form=form)[0]
-        to_append.append(Evolution(evo, candy))
-        __append_evolution(pogodata, evo, to_append)
-
+            evo = registry.form(form)[0]
+        evolutions.append(Evolution(evo, candy))
+    return evolutions
+
+
+def _index_icons(paths: Iterable[str]) -> Dict[Tuple[str, str, Optional[str]], Set[int]]:
+    """
+    Parses in-game icon paths in a single pass. Keys are (dex, asset value, costume) of every non-shiny
+    Pokemon icon, values the genders there are icons for. Asset value 01 is the female icon of 00.
+    """
+    index = {}
+    for path in paths:
+        if not path.startswith(ICON_PREFIX):
+            continue
+        match = ICON_REGEX.match(path)
+        if not match:
+            continue
+        dex, value, costume, shiny = match.groups()
+        if shiny:
+            continue
+        gender = 0
+        if value == "01":
+            value = "00"
+            gender = 1
+        index.setdefault((dex, value, costume), set()).add(gender)
+    return index
 
-def __handle_match(icon):
-    icon = icon.replace(".png", "")
-    icon = icon.replace("Images/Pokemon/", "")
-    icon = icon.replace("_01", "_00", 1)
 
-    return icon
+def _asset_name(dex: str, value: str, costume: Optional[str] = None) -> str:
+    asset = "pokemon_icon_" + dex + "_" + value
+    if costume is not None:
+        asset += "_" + costume
+    return asset
 
 
 def _make_mon_list(pogodata):
@@ -301,178 +484,195 @@ def _make_mon_list(pogodata):
     mon_ids = pogodata.get_enum("HoloPokemonId")
     costumes = pogodata.get_enum("Costume")
     rarities = pogodata.get_enum("HoloPokemonClass")
+    types = _first_by_template(pogodata.types)
+    moves = _first_by_template(pogodata.moves)
+    registry = _MonRegistry()
 
     # Getting spawn ratios
-    print("Getting female/male ratios")
-    gender_ratios = {}
-    for templateid, entry in pogodata.get_gamemaster(r"^SPAWN_V\d{4}_POKEMON_.*", "genderSettings"):
-        gender_ratios[templateid.strip("SPAWN_")] = entry.get("gender", {})
-
-    # Creating a base mon list based on GM entries
-    print("Pokemon: Preparing Base Pokemon")
-    pattern = r"^V\d{4}_POKEMON_"
-    for templateid, entry in pogodata.get_gamemaster(pattern+".*", "pokemonSettings"):
-        template = entry.get("form", entry.get("pokemonId"))
-
-        if not template:
-            continue
-
-        mon = Pokemon(pogodata.icon_manager, entry)
-        mon.proto = CustomEnum(mon_ids.match(entry.get("pokemonId", 0)))
-        mon.form = CustomEnum(forms.match(entry.get("form", 0)))
-        mon.costume = CustomEnum(costumes(0))
-        mon.temp_evolution = CustomEnum(megas(0))
-        raw_rarity = entry.get("rarity", "POKEMON_CLASS_NORMAL").replace("RARITY", "CLASS")
-        mon.rarity = CustomEnum(rarities.match(raw_rarity))
-        mon.make_gen()
-
-        gender_settings = gender_ratios.get(templateid, {})
-        mon.male_ratio = gender_settings.get("malePercent")
-        mon.female_ratio = gender_settings.get("femalePercent")
-
-        locale_key = "pokemon_name_" + str(mon.proto.id).zfill(4)
-        form_locale_key = "form_" + str(mon.form.tmpl).lower()
-        mon.names = pogodata.language_manager.get_all(locale_key)
-        mon.form_names = pogodata.language_manager.get_all(form_locale_key)
-
-        mon.moves += [pogodata.get_moves(move=t)[0] for t in mon.raw.get("quickMoves", [])]
-        mon.moves += [pogodata.get_moves(move=t)[0] for t in mon.raw.get("cinematicMoves", [])]
+    with pogodata.stats.stage("mons:base") as stage:
+        print("Getting female/male ratios")
+        gender_ratios = {}
+        for templateid, entry in pogodata.get_gamemaster(r"^SPAWN_V\d{4}_POKEMON_.*", "genderSettings"):
+            gender_ratios[templateid.strip("SPAWN_")] = entry.get("gender", {})
+
+        # Creating a base mon list based on GM entries
+        print("Pokemon: Preparing Base Pokemon")
+        pattern = r"^V\d{4}_POKEMON_"
+        for templateid, entry in pogodata.get_gamemaster(pattern+".*", "pokemonSettings"):
+            template = entry.get("form", entry.get("pokemonId"))
+
+            if not template:
+                continue
+
+            mon = Pokemon(pogodata.icon_manager, entry)
+            mon.proto = CustomEnum(mon_ids.match(entry.get("pokemonId", 0)))
+            mon.form = CustomEnum(forms.match(entry.get("form", 0)))
+            mon.costume = CustomEnum(costumes(0))
+            mon.temp_evolution = CustomEnum(megas(0))
+            raw_rarity = entry.get("rarity", "POKEMON_CLASS_NORMAL").replace("RARITY", "CLASS")
+            mon.rarity = CustomEnum(rarities.match(raw_rarity))
+            mon.make_gen()
+
+            gender_settings = gender_ratios.get(templateid, {})
+            mon.male_ratio = gender_settings.get("malePercent")
+            mon.female_ratio = gender_settings.get("femalePercent")
+
+            locale_key = "pokemon_name_" + str(mon.proto.id).zfill(4)
+            form_locale_key = "form_" + str(mon.form.tmpl).lower()
+            mon.names = pogodata.language_manager.get_all(locale_key)
+            mon.form_names = pogodata.language_manager.get_all(form_locale_key)
+
+            mon.moves += [moves[t] for t in mon.raw.get("quickMoves", [])]
+            mon.moves += [moves[t] for t in mon.raw.get("cinematicMoves", [])]
         
-        mon.elite_moves = [pogodata.get_moves(move=t)[0] for t in mon.raw.get("eliteQuickMove", [])]
-        mon.elite_moves = [pogodata.get_moves(move=t)[0] for t in mon.raw.get("eliteCinematicMove", [])]
+            mon.elite_moves = [moves[t] for t in mon.raw.get("eliteQuickMove", [])]
+            mon.elite_moves += [moves[t] for t in mon.raw.get("eliteCinematicMove", [])]
 
-        mon.make_assets()
-        mon.make_internal_id()
-        __typing(pogodata, mon, "type", "type2")
+            mon.make_assets()
+            mon.make_internal_id()
+            __typing(types, mon, "type", "type2")
 
-        mon.make_query()
+            mon.make_query()
 
-        pogodata.mons.append(mon)
+            pogodata.mons.append(mon)
+            registry.add(mon)
 
-        # Handling Temp (Mega) Evolutions
-        for temp_evo in mon.raw.get("tempEvoOverrides", []):
-            evo: Pokemon = mon.copy()
-            evo.pokemon_type = PokemonType.TEMP_EVOLUTION
+            # Handling Temp (Mega) Evolutions
+            for temp_evo in mon.raw.get("tempEvoOverrides", []):
+                evo: Pokemon = mon.copy()
+                evo.pokemon_type = PokemonType.TEMP_EVOLUTION
 
-            temp_evolution_template = temp_evo.get("tempEvoId")
-            evo.temp_evolution = CustomEnum(megas.match(temp_evolution_template))
+                temp_evolution_template = temp_evo.get("tempEvoId")
+                evo.temp_evolution = CustomEnum(megas.match(temp_evolution_template))
 
-            evo.raw = temp_evo
-            evo.names = pogodata.language_manager.get_all(locale_key + "_" + str(evo.temp_evolution.id).zfill(4))
+                evo.raw = temp_evo
+                evo.names = pogodata.language_manager.get_all(locale_key + "_" + str(evo.temp_evolution.id).zfill(4))
 
-            evo.types = []
-            __typing(pogodata, evo, "typeOverride1", "typeOverride2")
+                evo.types = []
+                __typing(types, evo, "typeOverride1", "typeOverride2")
 
-            evo.make_stats()
-            evo.make_info()
-            evo.make_internal_id()
-            evo.make_assets()
-            evo.make_query()
+                evo.make_stats()
+                evo.make_info()
+                evo.make_internal_id()
+                evo.make_assets()
+                evo.make_query()
 
-            pogodata.mons.append(evo)
+                pogodata.mons.append(evo)
+                registry.add(evo)
 
-            evo_branch = mon.raw.get("evolutionBranch", [])
-            energy_initial = 0
-            energy_subsequent = 0
-            for possible_evo in evo_branch:
-                if possible_evo.get("temporaryEvolution") == evo.temp_evolution.tmpl:
-                    energy_initial: int = possible_evo.get("temporaryEvolutionEnergyCost", 0)
-                    energy_subsequent: int = possible_evo.get("temporaryEvolutionEnergyCostSubsequent", 0)
-                    break
-            mon.temp_evolutions.append(TempEvolution(evo, energy_initial, energy_subsequent))
+                evo_branch = mon.raw.get("evolutionBranch", [])
+                energy_initial = 0
+                energy_subsequent = 0
+                for possible_evo in evo_branch:
+                    if possible_evo.get("temporaryEvolution") == evo.temp_evolution.tmpl:
+                        energy_initial: int = possible_evo.get("temporaryEvolutionEnergyCost", 0)
+                        energy_subsequent: int = possible_evo.get("temporaryEvolutionEnergyCostSubsequent", 0)
+                        break
+                mon.temp_evolutions.append(TempEvolution(evo, energy_initial, energy_subsequent))
+        stage.objects = len(pogodata.mons)
 
     # Going through GM Forms and adding missing Forms (Unown, Spinda) and making in-game assets
-    print("Pokemon: Adding missing forms")
-    for template, formsettings in pogodata.get_gamemaster(r"^FORMS_V\d{4}_POKEMON_.*", "formSettings"):
-        form_list = formsettings.get("forms", [])
-        for form in form_list:
-            formname = form.get("form")
-            if formname:
-                mon = pogodata.get_mons(form=form.get("form"))
-            if not formname or not mon:
-                mon = pogodata.get_mons(pokemon=formsettings["pokemon"])[0]
-                mon = mon.copy()
-                mon.pokemon_type = PokemonType.FORM
-                mon.form = CustomEnum(forms.match(form.get("form", 0)))
-                mon.make_query()
-                pogodata.mons.append(mon)
-            else:
-                mon = mon[0]
-
-            asset_value = form.get("assetBundleValue")
-            asset_suffix = form.get("assetBundleSuffix")
-            if asset_value or asset_suffix:
-                mon._asset_value = asset_value
-                mon._asset_suffix = asset_suffix
+    mon_count = len(pogodata.mons)
+    with pogodata.stats.stage("mons:forms") as stage:
+        print("Pokemon: Adding missing forms")
+        for template, formsettings in pogodata.get_gamemaster(r"^FORMS_V\d{4}_POKEMON_.*", "formSettings"):
+            form_list = formsettings.get("forms", [])
+            for form in form_list:
+                formname = form.get("form")
+                if formname:
+                    mon = registry.form(form.get("form"))
+                if not formname or not mon:
+                    mon = registry.proto(formsettings["pokemon"])[0]
+                    mon = mon.copy()
+                    mon.pokemon_type = PokemonType.FORM
+                    mon.form = CustomEnum(forms.match(form.get("form", 0)))
+                    mon.make_query()
+                    pogodata.mons.append(mon)
+                    registry.add(mon)
+                else:
+                    mon = mon[0]
+
+                asset_value = form.get("assetBundleValue")
+                asset_suffix = form.get("assetBundleSuffix")
+                if asset_value or asset_suffix:
+                    mon._asset_value = asset_value
+                    mon._asset_suffix = asset_suffix
 
-            mon.make_assets()
-            mon.make_info()
-            mon.make_stats()
-            mon.make_internal_id()
-            mon.make_query()
-
-    # Temp Evolution assets
-    print("Pokemon: Re-doing Temp Evolutions for proper assets")
-    evo_gm = pogodata.get_gamemaster(
-        r"^TEMPORARY_EVOLUTION_V\d{4}_POKEMON_.*",
-        "temporaryEvolutionSettings"
-    )
-    for base_template, evos in evo_gm:
-        base_template = evos.get("pokemonId", "")
-        evos = evos.get("temporaryEvolutions", [])
-        for temp_evo_raw in evos:
-            mons = pogodata.get_mons(
-                pokemon=base_template,
-                temp_evolution=temp_evo_raw["temporaryEvolutionId"]
-            )
-            for mon in mons:
-                mon.asset_value = temp_evo_raw["assetBundleValue"]
                 mon.make_assets()
+                mon.make_info()
+                mon.make_stats()
+                mon.make_internal_id()
                 mon.make_query()
+        stage.objects = len(pogodata.mons) - mon_count
 
-    # Making Pokemon.evolutions attributes
-    print("Pokemon: Appending evolutions")
-    for mon in pogodata.mons:
-        evos = []
-        __append_evolution(pogodata, mon, evos)
-        mon.evolutions = evos
+    # Temp Evolution assets
+    with pogodata.stats.stage("mons:temp_evolutions"):
+        print("Pokemon: Re-doing Temp Evolutions for proper assets")
+        evo_gm = pogodata.get_gamemaster(
+            r"^TEMPORARY_EVOLUTION_V\d{4}_POKEMON_.*",
+            "temporaryEvolutionSettings"
+        )
+        for base_template, evos in evo_gm:
+            base_template = evos.get("pokemonId", "")
+            evos = evos.get("temporaryEvolutions", [])
+            for temp_evo_raw in evos:
+                mons = registry.temp_evolution(base_template, temp_evo_raw["temporaryEvolutionId"])
+                for mon in mons:
+                    mon._asset_value = temp_evo_raw["assetBundleValue"]
+                    mon.make_assets()
+                    mon.make_query()
 
     # Costumes
-    print("Pokemon: Checking costumes & female assets")
-    icons = get_repo_content(INGAME_ICONS, ICON_SHA)
-    base_regex = r"Images/Pokemon/pokemon_icon{}.png"
-
-    for icon in icons:
-        gender_match = re.match(base_regex.format(r"_\d{3}_01(?!(_\d*)_?shiny).*"), icon)
-        if gender_match:
-            og_asset = __handle_match(icon)
-
-            mons: List[Pokemon] = pogodata.get_mons(assets=og_asset)
-
-            for mon in mons:
-                mon._has_female_asset = True
-                mon.make_assets()
-
-    for icon in icons:
-        costume_match = re.match(base_regex.format(r"(_\d*){3}(?!\d*_?shiny)"), icon)
-
-        if costume_match:
-            icon = __handle_match(icon)
-
-            costume = re.findall(r"_\d*$", icon)[0]
-            og_asset = re.sub(costume + "$", "", icon)
-            costume = int(costume.strip("_"))
-
-            mon = pogodata.get_mons(assets=og_asset)[0]
-
-            copy: Pokemon = mon.copy()
-            copy.costume = CustomEnum(costumes(costume))
-            copy.pokemon_type = PokemonType.COSTUME
-            copy.make_assets()
-            copy.make_internal_id()
-            copy.make_query()
-            pogodata.mons.append(copy)
+    mon_count = len(pogodata.mons)
+    with pogodata.stats.stage("mons:costumes") as stage:
+        print("Pokemon: Checking costumes & female assets")
+        with pogodata.fetching() as fetcher:
+            icons = _index_icons(fetcher.repo_content(INGAME_ICONS, ICON_SHA).result())
+        for mon in pogodata.mons:
+            registry.add_assets(mon)
+
+        for (dex, value, costume), genders in icons.items():
+            if costume is None and 1 in genders:
+                mons: List[Pokemon] = registry.asset(_asset_name(dex, value))
+
+                for mon in mons:
+                    mon._has_female_asset = True
+                    mon.make_assets()
+
+        # every costume icon becomes a copy of the Pokemon using the icon without it,
+        # with a female asset only if there's a female icon of the costume itself
+        for (dex, value, costume), genders in icons.items():
+            if costume is not None:
+                mons = registry.asset(_asset_name(dex, value))
+                if not mons:
+                    continue
+                mon = mons[0]
+
+                copy: Pokemon = mon.copy()
+                copy.costume = CustomEnum(costumes(int(costume)))
+                copy.pokemon_type = PokemonType.COSTUME
+                copy._has_female_asset = 1 in genders
+                copy.make_assets()
+                copy.make_internal_id()
+                copy.make_query()
+                pogodata.mons.append(copy)
+                registry.add(copy)
+                registry.add_assets(copy)
+
+        stage.objects = len(pogodata.mons) - mon_count
 
     # sort final list by mon, form, temp evo, costume
     pogodata.mons = sorted(pogodata.mons,
                            key=lambda m: (m.proto.id, m.form.id, m.temp_evolution.id, m.costume.id))
+
+    # Making Pokemon.evolutions attributes
+    with pogodata.stats.stage("mons:evolutions") as stage:
+        print("Pokemon: Appending evolutions")
+        graph = EvolutionGraph()
+        for mon in pogodata.mons:
+            graph.add(mon, __direct_evolutions(registry, mon))
+        for mon in pogodata.mons:
+            mon.evolutions = list(graph.chain(mon))
+        graph.make_families(pogodata.mons)
+        pogodata.evolution_graph = graph
+        stage.objects = sum(len(evolutions) for evolutions in graph.forward.values())
@@ -0,0 +1,61 @@
+import re
+
+from typing import Dict, List, Tuple, Optional
+
+BLOCK_REGEX = re.compile(r"^\s*(message|enum|oneof|service|extend)\s+([\w.]+)\s*{")
+ENUM_ENTRY_REGEX = re.compile(r"^\s*(\w+)\s*=\s*(-?(?:0x[0-9a-fA-F]+|\d+))")
+
+
+class ProtoIndex:
+    """
+    Index of every enum in a .proto file, built in one pass over it.
+
+    enums: enum name -> entries of the first enum with that name, wherever it's declared
+    messages: message name -> enums declared directly inside that message -> entries
+    Names are stored lowercase, since lookups are case insensitive.
+    """
+    def __init__(self, raw_protos: str):
+        self.enums: Dict[str, Dict[str, int]] = {}
+        self.messages: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+        # (block kind, lowercase name, enum entries if it's an enum)
+        stack: List[Tuple[str, str, Optional[Dict[str, int]]]] = []
+
+        for line in raw_protos.splitlines():
+            line = line.split("//", 1)[0]
+            if not line.strip():
+                continue
+
+            opens = line.count("{")
+            closes = line.count("}")
+
+            block = BLOCK_REGEX.match(line)
+            if block:
+                kind, name = block.groups()
+                name = name.lower()
+                entries = None
+                if kind == "enum":
+                    entries = {}
+                    self.enums.setdefault(name, entries)
+                    if stack and stack[-1][0] == "message":
+                        self.messages[stack[-1][1]].setdefault(name, entries)
+                elif kind == "message":
+                    self.messages.setdefault(name, {})
+                stack.append((kind, name, entries))
+                opens -= 1
+            elif stack and stack[-1][0] == "enum":
+                entry = ENUM_ENTRY_REGEX.match(line)
+                if entry:
+                    key, value = entry.groups()
+                    stack[-1][2][key] = int(value, 16) if "x" in value else int(value)
+
+            for _ in range(opens):
+                stack.append(("", "", None))
+            for _ in range(closes):
+                if stack:
+                    stack.pop()
+
+    def get(self, enum: str, message: Optional[str] = None) -> Optional[Dict[str, int]]:
+        if message is None:
+            return self.enums.get(enum.lower())
+        return self.messages.get(message.lower(), {}).get(enum.lower())
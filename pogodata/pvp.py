@@ -0,0 +1,271 @@
+import os
+import zlib
+import multiprocessing
+import pickle
+import hashlib
+
+from array import array
+from math import floor
+from bisect import bisect_left
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple, Sequence, Optional, Any, List
+
+from .cp import CPM, LEVELS, ALL_IVS, level_index
+from .errors import InvalidQueryArgument
+
+# league: CP cap
+LEAGUES: Dict[str, int] = {
+    "little": 500,
+    "great": 1500,
+    "ultra": 2500
+}
+LEVEL_CAPS: Tuple[int, ...] = (40, 41, 50, 51)
+# Bump whenever tables are calculated differently, so cached ones are rebuilt
+TABLE_VERSION = 1
+CACHE_FILE = "pvp_ranks.bin"
+# level of IVs that are above the CP cap even at level 1
+UNREACHABLE = 255
+
+BaseStats = Tuple[int, int, int]
+
+
+def iv_index(ivs: Sequence[int]) -> int:
+    """
+    Position of an IV combination in ALL_IVS and every RankTable
+    """
+    try:
+        attack, defense, stamina = (int(iv) for iv in ivs)
+    except (TypeError, ValueError):
+        raise InvalidQueryArgument(ivs)
+    if not (0 <= attack <= 15 and 0 <= defense <= 15 and 0 <= stamina <= 15):
+        raise InvalidQueryArgument(ivs)
+    return attack * 256 + defense * 16 + stamina
+
+
+class LeagueRank:
+    """
+    Where an IV combination places in a league: the highest level it can reach under the CP cap
+    and its stat product there, compared to all 4096 IV combinations. rank, level and cp are None
+    if it's above the CP cap even at level 1.
+    """
+    def __init__(self,
+                 rank: Optional[int],
+                 level: Optional[float],
+                 cp: Optional[int],
+                 stat_product: float,
+                 percentage: float):
+        self.rank = rank
+        self.level = level
+        self.cp = cp
+        self.stat_product = stat_product
+        self.percentage = percentage
+
+    def __repr__(self):
+        return f"<LeagueRank #{self.rank} level {self.level} {self.cp}cp>"
+
+
+def _stats_at(base_stats: BaseStats, ivs: Sequence[int], index: int) -> Tuple[int, float]:
+    # CP and stat product, calculated like pogodata.cp does
+    multiplier = CPM[index]
+    squared = multiplier**2
+    attack = base_stats[0] + ivs[0]
+    defense = base_stats[1] + ivs[1]
+    stamina = base_stats[2] + ivs[2]
+    health = max(10, floor(stamina * multiplier))
+    cp = floor((attack * defense**0.5 * stamina**0.5 * squared) / 10)
+    return cp, attack * defense * squared * health
+
+
+class RankTable:
+    """
+    ranks: the rank of every IV combination, in ALL_IVS order. 0 if it's above the CP cap at level 1.
+    levels: the position in LEVELS of the highest level below the CP cap, UNREACHABLE if there's none
+    """
+    __slots__ = ("ranks", "levels", "best")
+
+    def __init__(self, ranks: array, levels: array):
+        self.ranks = ranks
+        self.levels = levels
+        # the rank 1 IVs
+        self.best = ranks.index(1) if 1 in ranks else 0
+
+    def rank(self, base_stats: BaseStats, ivs: Sequence[int]) -> LeagueRank:
+        index = iv_index(ivs)
+        level = self.levels[index]
+        if level == UNREACHABLE:
+            return LeagueRank(None, None, None, 0, 0)
+
+        cp, stat_product = _stats_at(base_stats, ALL_IVS[index], level)
+        _, best = _stats_at(base_stats, ALL_IVS[self.best], self.levels[self.best])
+        return LeagueRank(self.ranks[index], LEVELS[level], cp, stat_product, stat_product / best * 100)
+
+
+def _build_tables(base_stats: BaseStats,
+                  max_cps: Sequence[int],
+                  level_caps: Sequence[int]) -> Dict[Tuple[int, int], Tuple[bytes, bytes]]:
+    """
+    Ranks of one base stat combination in every league and under every level cap, as bytes of
+    RankTable's arrays. Runs in worker processes.
+    """
+    squared = [multiplier**2 for multiplier in CPM]
+    roots = []
+    attack_defense = []
+    staminas = []
+    for attack_iv, defense_iv, stamina_iv in ALL_IVS:
+        attack = base_stats[0] + attack_iv
+        defense = base_stats[1] + defense_iv
+        stamina = base_stats[2] + stamina_iv
+        roots.append(attack * defense**0.5 * stamina**0.5)
+        attack_defense.append(attack * defense)
+        staminas.append(stamina)
+
+    tables = {}
+    for max_cp in max_cps:
+        # CP only goes up with the level, so the highest level under the CP cap is found by bisecting.
+        # Rounding may put the bisected level one off, it's corrected using calculate_cp's formula.
+        uncapped = []
+        limit = (max_cp + 1) * 10
+        for root in roots:
+            level = bisect_left(squared, limit / root) - 1
+            while level + 1 < len(squared) and floor(root * squared[level + 1] / 10) <= max_cp:
+                level += 1
+            while level >= 0 and floor(root * squared[level] / 10) > max_cp:
+                level -= 1
+            uncapped.append(level)
+
+        previous_levels = None
+        for level_cap in level_caps:
+            cap_index = level_index(level_cap)
+            levels = [min(level, cap_index) for level in uncapped]
+            # weaker Pokemon reach the CP cap before any level cap
+            if levels == previous_levels:
+                tables[(max_cp, level_cap)] = tables[(max_cp, previous_cap)]
+                continue
+            previous_levels, previous_cap = levels, level_cap
+
+            # the same stat product _stats_at calculates
+            products = [
+                product * squared[level] * max(10, floor(stamina * CPM[level])) if level >= 0 else -1.0
+                for product, stamina, level in zip(attack_defense, staminas, levels)
+            ]
+
+            ranks = array("H", bytes(2 * len(ALL_IVS)))
+            order = sorted(range(len(ALL_IVS)), key=products.__getitem__, reverse=True)
+            rank = 0
+            previous = None
+            for place, index in enumerate(order, start=1):
+                if products[index] < 0:
+                    break
+                # equal stat products share a rank
+                if products[index] != previous:
+                    rank = place
+                    previous = products[index]
+                ranks[index] = rank
+
+            levels = array("B", (UNREACHABLE if level < 0 else level for level in levels))
+            tables[(max_cp, level_cap)] = (ranks.tobytes(), levels.tobytes())
+    return tables
+
+
+class RankTables:
+    """
+    PvP IV rankings of every Pokemon in every league and under every level cap.
+
+    Tables only depend on base stats, so they're built once per base stat combination (forms and costumes
+    mostly share them) and identical tables are only kept once. With a cache_dir, tables are saved there
+    and reused as long as the base stats, leagues, level caps and CP multipliers are the same.
+
+    max_workers: processes to build tables in. 0 (the default) builds them in this process, None starts
+        one per CPU. Processes are spawned, not forked, since forking a process that runs other threads
+        (e.g. a web server or PogoData's background reloads) can deadlock. Scripts using them need
+        an `if __name__ == "__main__":` guard.
+    """
+    def __init__(self,
+                 mons: Sequence[Any],
+                 cache_dir: Optional[str] = None,
+                 max_workers: Optional[int] = 0,
+                 leagues: Optional[Dict[str, int]] = None,
+                 level_caps: Sequence[int] = LEVEL_CAPS):
+        self.leagues: Dict[str, int] = dict(LEAGUES if leagues is None else leagues)
+        self.level_caps: Tuple[int, ...] = tuple(level_caps)
+        self.tables: Dict[Tuple[BaseStats, int, int], RankTable] = {}
+
+        base_stats = sorted({tuple(mon.base_stats) for mon in mons if len(mon.base_stats) == 3})
+        self.key = hashlib.sha256(repr((
+            TABLE_VERSION, base_stats, sorted(self.leagues.items()), self.level_caps, CPM.tobytes()
+        )).encode()).hexdigest()
+
+        path = os.path.join(cache_dir, CACHE_FILE) if cache_dir else None
+        if path and self.__load(path):
+            return
+
+        print(f"Building PvP rank tables for {len(base_stats)} base stat combinations")
+        self.__build(base_stats, max_workers)
+        if path:
+            self.__save(path)
+
+    def __build(self, base_stats: List[BaseStats], max_workers: Optional[int]):
+        max_cps = sorted(set(self.leagues.values()))
+        arguments = (base_stats, repeat(max_cps), repeat(self.level_caps))
+        if max_workers == 0:
+            results = map(_build_tables, *arguments)
+            self.__add(base_stats, results)
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            # a few chunks per process, so they finish at about the same time
+            chunksize = max(1, len(base_stats) // (workers * 4))
+            with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                self.__add(base_stats, executor.map(_build_tables, *arguments, chunksize=chunksize))
+
+    def __add(self, base_stats: List[BaseStats], results):
+        unique: Dict[Tuple[bytes, bytes], RankTable] = {}
+        for stats, tables in zip(base_stats, results):
+            for (max_cp, level_cap), data in tables.items():
+                table = unique.get(data)
+                if table is None:
+                    ranks, levels = array("H"), array("B")
+                    ranks.frombytes(data[0])
+                    levels.frombytes(data[1])
+                    table = unique[data] = RankTable(ranks, levels)
+                self.tables[(stats, max_cp, level_cap)] = table
+
+    def __load(self, path: str) -> bool:
+        try:
+            with open(path, "rb") as f:
+                cached = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return False
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError, AttributeError):
+            print(f"Couldn't read cached PvP rank tables from {path}, rebuilding them")
+            return False
+        if not isinstance(cached, dict) or cached.get("key") != self.key:
+            return False
+        self.tables = cached["tables"]
+        return True
+
+    def __save(self, path: str):
+        payload = zlib.compress(pickle.dumps({"key": self.key, "tables": self.tables},
+                                             protocol=pickle.HIGHEST_PROTOCOL))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+    def table(self, mon: Any, league: str = "great", level_cap: int = 50) -> RankTable:
+        if league not in self.leagues:
+            raise InvalidQueryArgument(league)
+        if level_cap not in self.level_caps:
+            raise InvalidQueryArgument(level_cap)
+        table = self.tables.get((tuple(mon.base_stats), self.leagues[league], level_cap))
+        if table is None:
+            raise InvalidQueryArgument(mon)
+        return table
+
+    def rank(self, mon: Any, ivs: Sequence[int], league: str = "great", level_cap: int = 50) -> LeagueRank:
+        """
+        mon: a Pokemon with base stats
+        league: one of leagues, e.g. "great"
+        level_cap: one of level_caps
+        """
+        return self.table(mon, league, level_cap).rank(tuple(mon.base_stats), ivs)
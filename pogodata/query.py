@@ -0,0 +1,314 @@
+import math
+import time
+
+from array import array
+from threading import Lock
+from collections import OrderedDict
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Set, Any, Callable, Optional, Sequence, Hashable, Iterable, Tuple, Iterator
+
+from .custom_types import (QueryType, Predicate, EqualsPredicate, EnumPredicate, NumberPredicate,
+                           ListPredicate)
+
+EMPTY: Set[int] = frozenset()
+
+PREDICATES: Dict[Callable, Callable[[Any], Predicate]] = {
+    QueryType.int_: EqualsPredicate,
+    QueryType.string: EqualsPredicate,
+    QueryType.bool_: EqualsPredicate,
+    QueryType.float_: EqualsPredicate,
+    QueryType.customenum: EnumPredicate,
+    QueryType.qint: lambda original: NumberPredicate(original, int),
+    QueryType.qfloat: lambda original: NumberPredicate(original, float),
+    QueryType.qlist: ListPredicate
+}
+
+
+def compile_query(schema: Dict[str, Callable], kwargs: Dict[str, Any]) -> Dict[str, Predicate]:
+    """
+    Parses every query argument once, as declared in a QUERY_SCHEMA. Arguments that aren't part of the
+    schema (e.g. language or iconset) are ignored.
+    """
+    return {key: PREDICATES[schema[key]](value) for key, value in kwargs.items() if key in schema}
+
+
+class Page(list):
+    """
+    A list of query results. If the query had a limit and there are more results,
+    next_cursor continues after the last of them.
+    """
+    def __init__(self, objects: Iterable[Any] = (), next_cursor: Optional[str] = None):
+        super().__init__(objects)
+        self.next_cursor = next_cursor
+
+
+def iter_scan(objects: Sequence[Any], start: int = 0, **kwargs) -> Iterator[Tuple[int, Any]]:
+    """
+    Compares the objects of a list of objects of the same class one by one, starting at position start.
+    Yields (position, object) of every match.
+    """
+    if not objects:
+        return
+
+    if "id" in kwargs and "id" not in objects[0].QUERY_SCHEMA:
+        id_ = int(kwargs["id"])
+        for position in range(start, len(objects)):
+            if objects[position].id == id_:
+                yield position, objects[position]
+        return
+
+    predicates = compile_query(objects[0].QUERY_SCHEMA, kwargs)
+    for position in range(start, len(objects)):
+        if objects[position].matches(predicates):
+            yield position, objects[position]
+
+
+def scan_objects(objects: Sequence[Any], **kwargs) -> List[Any]:
+    """
+    Compares every object of a list of objects of the same class
+    """
+    return [obj for _, obj in iter_scan(objects, **kwargs)]
+
+
+def _index_keys(query_type: Callable, value: Any) -> Optional[Iterable[Hashable]]:
+    """
+    The keys an object is filed under for one query field, or None if the field can't be indexed
+    """
+    try:
+        if query_type is QueryType.customenum:
+            return [("id", value.id), ("tmpl", value.tmpl)]
+        elif query_type in (QueryType.string, QueryType.int_, QueryType.bool_, QueryType.float_):
+            hash(value)
+            return [value]
+        elif query_type is QueryType.qlist:
+            if isinstance(value, str):
+                # `in` would match substrings
+                return None
+            return set(value)
+    except (TypeError, AttributeError):
+        pass
+    return None
+
+
+class SortedNumbers:
+    """
+    A numeric query field of every object. by_position holds the values in object order (NaN if an object
+    has no usable value), values/positions the same values sorted, so ranges are found by bisecting.
+    A >, < or = lookup costs O(log n) plus the size of its result, which is why plain arrays are enough here.
+    """
+    def __init__(self, numbers: Sequence[Optional[float]]):
+        self.by_position = array("d", (math.nan if n is None else n for n in numbers))
+        order = sorted((n, p) for p, n in enumerate(self.by_position) if not math.isnan(n))
+        self.values = array("d", (n for n, _ in order))
+        self.positions = array("l", (p for _, p in order))
+
+    def lookup(self, predicate: NumberPredicate) -> Set[int]:
+        number = float(predicate.number)
+        if math.isnan(number):
+            return set()
+        if predicate.operator == ">":
+            return set(self.positions[bisect_right(self.values, number):])
+        if predicate.operator == "<":
+            return set(self.positions[:bisect_left(self.values, number)])
+        return set(self.positions[bisect_left(self.values, number):bisect_right(self.values, number)])
+
+
+def _sorted_numbers(objects: Sequence[Any], key: str) -> Optional[SortedNumbers]:
+    numbers = []
+    for obj in objects:
+        value = obj.query.get(key)
+        if value is not None and not isinstance(value, (int, float)):
+            return None
+        numbers.append(value)
+    return SortedNumbers(numbers)
+
+
+class QueryIndex:
+    """
+    Hash indexes over the query dicts of a fully built object list.
+
+    Equality lookups are answered by intersecting posting sets, qint/qfloat comparisons by bisecting
+    sorted numbers. Predicates without an index (qlist AND/OR, unhashable values) are only
+    matched on the remaining candidates. Results are the same as comparing every object, in the same order.
+    """
+    def __init__(self, objects: Sequence[Any]):
+        self.objects = objects
+        self.schema: Dict[str, Callable] = objects[0].QUERY_SCHEMA if objects else {}
+        self.ids: Dict[Any, List[int]] = {}
+        self.postings: Dict[str, Dict[Hashable, Set[int]]] = {}
+        # objects without a field aren't filtered by it, so they match every lookup on it
+        self.missing: Dict[str, Set[int]] = {}
+        self.unindexed: Set[str] = set()
+        self.numbers: Dict[str, SortedNumbers] = {}
+
+        for position, obj in enumerate(objects):
+            self.ids.setdefault(obj.id, []).append(position)
+            for key, query_type in self.schema.items():
+                if key not in obj.query:
+                    self.missing.setdefault(key, set()).add(position)
+                    continue
+                if key in self.unindexed:
+                    continue
+                keys = _index_keys(query_type, obj.query[key])
+                if keys is None:
+                    self.unindexed.add(key)
+                    continue
+                postings = self.postings.setdefault(key, {})
+                for index_key in keys:
+                    postings.setdefault(index_key, set()).add(position)
+
+        for key in self.unindexed:
+            self.postings.pop(key, None)
+
+        for key, query_type in self.schema.items():
+            if query_type in (QueryType.qint, QueryType.qfloat):
+                numbers = _sorted_numbers(objects, key)
+                if numbers is not None:
+                    self.numbers[key] = numbers
+
+    def column(self, key: str) -> array:
+        """
+        All values of a numeric query field in object order, NaN where an object has none
+        """
+        return self.numbers[key].by_position
+
+    def __lookup(self, key: str, predicate: Predicate) -> Optional[Set[int]]:
+        if isinstance(predicate, NumberPredicate) and key in self.numbers:
+            return self.numbers[key].lookup(predicate) | self.missing.get(key, EMPTY)
+        if key in self.unindexed:
+            return None
+
+        postings = self.postings.get(key, {})
+        try:
+            if isinstance(predicate, EnumPredicate):
+                result = postings.get(("id", predicate.original), EMPTY) | postings.get(("tmpl", predicate.tmpl), EMPTY)
+            elif isinstance(predicate, ListPredicate) and predicate.mode == ListPredicate.SINGLE:
+                result = postings.get(predicate.values[0], EMPTY)
+            elif isinstance(predicate, EqualsPredicate):
+                result = postings.get(predicate.original, EMPTY)
+            else:
+                return None
+        except TypeError:
+            return None
+
+        return result | self.missing.get(key, EMPTY)
+
+    def iter_query(self, start: int = 0, **kwargs) -> Iterator[Tuple[int, Any]]:
+        """
+        Yields (position, object) of every match at or after position start, in order.
+        Predicates without an index are only matched as far as the results are consumed.
+        """
+        if not self.objects:
+            return
+
+        if "id" in kwargs and "id" not in self.schema:
+            for position in self.ids.get(int(kwargs["id"]), []):
+                if position >= start:
+                    yield position, self.objects[position]
+            return
+
+        found = []
+        remaining = {}
+        for key, predicate in compile_query(self.schema, kwargs).items():
+            positions = self.__lookup(key, predicate)
+            if positions is None:
+                remaining[key] = predicate
+            elif not positions:
+                return
+            else:
+                found.append(positions)
+
+        if found:
+            found.sort(key=len)
+            candidates = sorted(found[0].intersection(*found[1:]))
+            positions = candidates[bisect_left(candidates, start):]
+        else:
+            positions = range(start, len(self.objects))
+
+        for position in positions:
+            obj = self.objects[position]
+            if not remaining or obj.matches(remaining):
+                yield position, obj
+
+    def query(self, **kwargs) -> List[Any]:
+        return [obj for _, obj in self.iter_query(**kwargs)]
+
+
+class QueryCache:
+    """
+    A bounded LRU cache of query results, keyed on the query arguments that affect them.
+
+    max_size: how many results to keep
+    ttl: seconds a result stays valid. None keeps results until they're evicted or the cache is cleared
+    """
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.generation: int = 0
+        self.__entries: "OrderedDict[Hashable, Tuple[float, Tuple, Optional[str]]]" = OrderedDict()
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @staticmethod
+    def key(category: str, schema: Dict[str, Callable], kwargs: Dict[str, Any], *page: Any) -> Optional[Hashable]:
+        """
+        The cache key of a query, or None if it can't be cached. Arguments that don't affect the result
+        (e.g. language) are left out, and the argument order doesn't matter. Values keep their type,
+        because "150" and 150 match different things.
+
+        page: limit, offset and cursor of a paginated query
+        """
+        arguments = []
+        for name, value in kwargs.items():
+            if name in schema or name == "id":
+                arguments.append((name, type(value).__name__, value))
+        key = (category, tuple(sorted(arguments, key=lambda argument: argument[0])), page)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key: Hashable) -> Optional[Page]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self.__entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            # callers may change the list they get
+            return Page(entry[1], entry[2])
+
+    def put(self, key: Hashable, result: List[Any], generation: int):
+        """
+        generation: the cache's generation from before the query was answered. Results of a query that
+            ran while the cache was cleared are dropped, they might come from replaced data.
+        """
+        with self.__lock:
+            if generation != self.generation:
+                return
+            self.__entries[key] = (time.monotonic(), tuple(result), getattr(result, "next_cursor", None))
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_size:
+                self.__entries.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+            self.generation += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "size": len(self.__entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
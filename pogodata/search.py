@@ -0,0 +1,181 @@
+import unicodedata
+
+from bisect import bisect_left
+from typing import List, Dict, Set, Any, Optional, Sequence, Tuple, Iterable
+
+# Ranks of the ways a name can match, best first
+EXACT = 0
+EXACT_WORD = 1
+PREFIX = 2
+PREFIX_WORD = 3
+FUZZY = 4
+# queries up to this long are matched without typos and answered from SearchIndex.short_prefixes
+SHORT_QUERY = 2
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercases text, strips accents and turns punctuation into spaces, so "Flabébé" and "flabebe",
+    or "Mr. Mime" and "mr mime" are the same
+    """
+    text = unicodedata.normalize("NFKD", text).casefold()
+    chars = []
+    for char in text:
+        if unicodedata.combining(char):
+            continue
+        chars.append(char if char.isalnum() else " ")
+    return " ".join("".join(chars).split())
+
+
+def _deletes(term: str, distance: int) -> Set[str]:
+    """
+    term and every string that's left after deleting up to distance characters from it
+    """
+    result = {term}
+    variants = {term}
+    for _ in range(distance):
+        variants = {v[:i] + v[i + 1:] for v in variants if len(v) > 1 for i in range(len(v))}
+        result |= variants
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Levenshtein distance including transpositions of neighbouring characters.
+    Anything above limit is returned as limit + 1.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = None
+    current = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+    return min(current[-1], limit + 1)
+
+
+class SearchIndex:
+    """
+    Finds objects by their names in every loaded language, by full name, word, prefix or with typos.
+
+    max_distance: how many typos a fuzzy match may have. Queries of up to 4 characters allow one.
+    """
+    def __init__(self, objects: Sequence[Any], max_distance: int = 2):
+        self.objects = objects
+        self.max_distance = max_distance
+        # (position of the object, language, normalized name)
+        self.entries: List[Tuple[int, str, str]] = []
+        self.terms: Dict[str, Set[int]] = {}
+        self.deletes: Dict[str, Set[str]] = {}
+
+        for position, obj in enumerate(objects):
+            for language, name in obj.names.items():
+                normalized = normalize(name or "")
+                if not normalized:
+                    continue
+                entry = len(self.entries)
+                self.entries.append((position, language, normalized))
+                for term in {normalized, *normalized.split()}:
+                    self.terms.setdefault(term, set()).add(entry)
+
+        self.sorted_terms = sorted(self.terms)
+        # short prefix: (rank, name length, position, entry) of every name it matches, best first.
+        # Short queries match a large part of all names, so searches walk these and stop at their limit.
+        self.short_prefixes: Dict[str, List[Tuple[int, int, int, int]]] = {}
+        for entry, (position, _, normalized) in enumerate(self.entries):
+            words = normalized.split()
+            for prefix in {word[:length] for word in words for length in range(1, SHORT_QUERY + 1)}:
+                if normalized == prefix:
+                    rank = EXACT
+                elif prefix in words:
+                    rank = EXACT_WORD
+                elif normalized.startswith(prefix):
+                    rank = PREFIX
+                else:
+                    rank = PREFIX_WORD
+                self.short_prefixes.setdefault(prefix, []).append((rank, len(normalized), position, entry))
+        for matches in self.short_prefixes.values():
+            matches.sort()
+        for term in self.terms:
+            for variant in _deletes(term, max_distance):
+                self.deletes.setdefault(variant, set()).add(term)
+
+    def __distance_for(self, query: str) -> int:
+        if len(query) <= SHORT_QUERY:
+            return 0
+        if len(query) <= 4:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def __prefixed(self, query: str) -> Iterable[str]:
+        for position in range(bisect_left(self.sorted_terms, query), len(self.sorted_terms)):
+            term = self.sorted_terms[position]
+            if not term.startswith(query):
+                break
+            yield term
+
+    def __search_short(self, query: str, language: Optional[str], limit: Optional[int]) -> List[Tuple[Tuple, Any]]:
+        results = []
+        found = set()
+        for rank, length, position, entry in self.short_prefixes.get(query, ()):
+            if len(results) == limit:
+                break
+            # the first match of an object is its best one
+            if position in found or (language is not None and self.entries[entry][1] != language):
+                continue
+            found.add(position)
+            results.append(((rank, 0, length, position), self.objects[position]))
+        return results
+
+    def search(self, name: str, language: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[Tuple, Any]]:
+        """
+        Returns ((rank, typos, name length, position), object) of every object whose name matches,
+        best matches first. Every object is only returned once.
+
+        language: only match names in this language (a Language value)
+        limit: only return the best this many
+        """
+        query = normalize(name)
+        if not query:
+            return []
+        if len(query) <= SHORT_QUERY:
+            return self.__search_short(query, language, limit)
+
+        best: Dict[int, Tuple] = {}
+
+        def add(term: str, rank_full: int, rank_word: int, typos: int = 0):
+            for entry in self.terms[term]:
+                position, entry_language, normalized = self.entries[entry]
+                if language is not None and entry_language != language:
+                    continue
+                score = (rank_full if normalized == term else rank_word, typos, len(normalized), position)
+                if position not in best or score < best[position]:
+                    best[position] = score
+
+        if query in self.terms:
+            add(query, EXACT, EXACT_WORD)
+        for term in self.__prefixed(query):
+            if term != query:
+                add(term, PREFIX, PREFIX_WORD)
+
+        distance = self.__distance_for(query)
+        if distance:
+            candidates = set()
+            for variant in _deletes(query, distance):
+                candidates |= self.deletes.get(variant, set())
+            for term in candidates:
+                if term == query:
+                    continue
+                typos = edit_distance(query, term, distance)
+                if typos <= distance:
+                    add(term, FUZZY, FUZZY, typos)
+
+        return sorted(((score, self.objects[position]) for position, score in best.items()),
+                      key=lambda result: result[0])[:limit]
@@ -0,0 +1,415 @@
+from array import array
+from threading import RLock
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Tuple, Sequence, Set, Callable, Iterator, Union
+
+from .misc import PROTO_URL, GAMEMASTER_URL, INGAME_ICONS, ICON_SHA, EnumMatcher
+from .pokemon import _make_mon_list, Pokemon, EvolutionGraph, GAMEMASTER_SETTINGS as MON_SETTINGS
+from .type import _make_type_list, Type, TypeChart
+#from .event import _make_event_list, Event
+#from .item import _make_item_list, Item
+#from .grunt import _make_grunt_list, Grunt
+#from .raid import _make_raid_list
+from .move import _make_move_list, Move, GAMEMASTER_SETTINGS as MOVE_SETTINGS
+from .weather import _make_weather_list, Weather, GAMEMASTER_SETTINGS as WEATHER_SETTINGS
+#from .quest import _make_quest_list, Quest
+from .icons import IconManager
+from .language import LanguageManager, Language
+from .custom_types import DefaultEnum
+from .proto import ProtoIndex
+from .gamemaster import GameMasterIndex, iter_gamemaster
+from .cache import HttpCache, CHUNK_SIZE
+from .fetch import Fetcher
+from .metrics import ReloadStats
+from .query import QueryIndex, scan_objects, iter_scan
+from .search import SearchIndex
+from .pvp import RankTables
+from .dps import MovesetTable
+from .gameobject import DROPPED_RAW
+from .errors import InvalidQueryArgument, RawDataDropped
+
+# GameMaster settings the builders read, everything else is skipped when streaming
+GAMEMASTER_SETTINGS = MON_SETTINGS + MOVE_SETTINGS + WEATHER_SETTINGS
+
+
+# Every category's builder and the categories it reads, in the order they're built eagerly
+BUILDERS: Dict[str, Tuple[Callable, Tuple[str, ...]]] = {
+    "types": (_make_type_list, ()),
+    #"items": (_make_item_list, ()),
+    "weather": (_make_weather_list, ("types",)),
+    "moves": (_make_move_list, ("types",)),
+    "mons": (_make_mon_list, ("types", "moves")),
+    #"quests": (_make_quest_list, ("mons",)),
+    #"raids": (_make_raid_list, ("mons",)),
+    #"grunts": (_make_grunt_list, ("mons",)),
+    #"events": (_make_event_list, ("mons",)),
+}
+
+
+class Snapshot:
+    """
+    A complete set of game data. Each category's object list is frozen to a tuple once it's built,
+    so a snapshot can be shared between threads and replaced as a whole.
+
+    stream_gamemaster: parse the GameMaster entry by entry while it's downloaded and only keep
+        entries the builders need, instead of loading the whole document
+    keep_raw: keep raw protos, GameMaster entries and GameObject.raw after building
+    trace_memory: record each build stage's peak memory in stats, using tracemalloc
+    lazy: only download and parse protos, GameMaster and locales up front. Each category (and the
+        categories it depends on) is built on first access, icon file trees on first icon lookup.
+    """
+    def __init__(self,
+                 cache: Optional[HttpCache] = None,
+                 max_workers: int = 8,
+                 stream_gamemaster: bool = False,
+                 keep_raw: bool = True,
+                 trace_memory: bool = False,
+                 lazy: bool = False):
+        self.keep_raw = keep_raw
+        self.lazy = lazy
+        self.__objects: Dict[str, Sequence[Any]] = {category: [] for category in BUILDERS}
+        self.__built: Set[str] = set()
+        self.__building: Set[str] = set()
+        self.__indexes: Dict[str, QueryIndex] = {}
+        self.__search_indexes: Dict[str, SearchIndex] = {}
+        self.__rank_tables: Optional[RankTables] = None
+        self.__type_chart: Optional[TypeChart] = None
+        # weather id (None for no weather): table
+        self.__moveset_tables: Dict[Optional[int], MovesetTable] = {}
+        self.__build_lock = RLock()
+
+        self.language_manager: Optional[LanguageManager] = None
+        self.icon_manager: Optional[IconManager] = None
+        self.fetcher: Optional[Fetcher] = None
+        # made by the mons builder
+        self.evolution_graph: Optional[EvolutionGraph] = None
+
+        self.__cached_enums: Dict[str, EnumMatcher] = {}
+        self.raw_protos: str = ""
+        self.proto_index: Optional[ProtoIndex] = None
+        self.raw_gamemaster: List[Dict] = []
+        self.gamemaster: Optional[GameMasterIndex] = None
+        # set once keep_raw=False dropped raw protos, GameMaster entries and GameObject.raw
+        self.raw_dropped = False
+        # set if stream_gamemaster only kept the entries with GAMEMASTER_SETTINGS
+        self.gamemaster_streamed = False
+        self.stats = ReloadStats(trace_memory)
+
+        # for the short-lived fetchers of categories built lazily, see fetching()
+        self.__cache = cache
+        self.__max_workers = max_workers
+
+        with self.stats.trace():
+            self.fetcher = Fetcher(cache, max_workers, self.stats)
+            try:
+                self.__load(stream_gamemaster)
+                if not lazy:
+                    self.build()
+            finally:
+                self.fetcher.shutdown()
+                self.fetcher = None
+
+    def __load(self, stream_gamemaster: bool):
+        # Fetch stage: every download is started before anything waits on one
+        print("Downloading latest Protos, GameMaster, locales and icons")
+        protos = self.fetcher.get(PROTO_URL)
+        gamemaster = self.fetcher.get(GAMEMASTER_URL, stream=stream_gamemaster)
+        LanguageManager.fetch(self.fetcher)
+        if not self.lazy:
+            IconManager.fetch(self.fetcher)
+            self.fetcher.repo_content(INGAME_ICONS, ICON_SHA)
+
+        # Stages waiting on downloads include the time spent waiting
+        with self.stats.stage("languages"):
+            self.language_manager = LanguageManager(self.fetcher)
+        with self.stats.stage("icons"):
+            # a lazy IconManager downloads its file trees through its own fetcher once it's used
+            self.icon_manager = IconManager(None if self.lazy else self.fetcher, lazy=self.lazy, cache=self.__cache)
+        with self.stats.stage("protos") as stage:
+            self.raw_protos = protos.result().text
+            self.proto_index = ProtoIndex(self.raw_protos)
+            stage.objects = len(self.proto_index.enums)
+        with self.stats.stage("gamemaster") as stage:
+            if stream_gamemaster:
+                entries = iter_gamemaster(gamemaster.result().iter_content(CHUNK_SIZE))
+                self.gamemaster = GameMasterIndex(entries, settings=GAMEMASTER_SETTINGS)
+                self.gamemaster_streamed = True
+            else:
+                self.raw_gamemaster = gamemaster.result().json()
+                self.gamemaster = GameMasterIndex(self.raw_gamemaster)
+            stage.objects = len(self.gamemaster)
+
+    def build(self):
+        """
+        Builds every category that hasn't been built yet
+        """
+        for category in BUILDERS:
+            self.__ensure(category)
+
+    def __ensure(self, category: str) -> Sequence[Any]:
+        if category in self.__built:
+            return self.__objects[category]
+
+        with self.__build_lock:
+            # A builder reading its own category (e.g. mons looking up other mons) gets the list in progress
+            if category not in self.__built and category not in self.__building:
+                self.__build_category(category)
+        return self.__objects[category]
+
+    def __build_category(self, category: str):
+        builder, dependencies = BUILDERS[category]
+        for dependency in dependencies:
+            self.__ensure(dependency)
+
+        self.__building.add(category)
+        try:
+            with self.stats.stage(category) as stage:
+                builder(self)
+                stage.objects = len(self.__objects[category])
+        finally:
+            self.__building.discard(category)
+        self.__objects[category] = tuple(self.__objects[category])
+        with self.stats.stage(category + ":index") as stage:
+            self.__indexes[category] = QueryIndex(self.__objects[category])
+            stage.objects = len(self.__indexes[category].postings)
+        self.__built.add(category)
+
+        if len(self.__built) == len(BUILDERS):
+            self.__finish()
+
+    def __finish(self):
+        if not self.keep_raw:
+            self.__drop_raw()
+
+    @contextmanager
+    def fetching(self) -> Iterator[Fetcher]:
+        """
+        The reload's fetcher while the snapshot is loaded. Categories built lazily afterwards get
+        a fetcher that's shut down once they're done, so no thread pool outlives its downloads.
+        """
+        if self.fetcher is not None:
+            yield self.fetcher
+        else:
+            with Fetcher(self.__cache, self.__max_workers, self.stats) as fetcher:
+                yield fetcher
+
+    def __getstate__(self):
+        self.build()
+        state = self.__dict__.copy()
+        # enums are classes created at runtime, they're rebuilt from proto_index when needed
+        state["_Snapshot__cached_enums"] = {}
+        # search indexes are mostly typo variants, rebuilding them is cheaper than storing them
+        state["_Snapshot__search_indexes"] = {}
+        # PvP rank tables are large, they're cached in their own file instead
+        state["_Snapshot__rank_tables"] = None
+        state["_Snapshot__type_chart"] = None
+        state["_Snapshot__moveset_tables"] = {}
+        # everything is built, nothing is downloaded anymore
+        state["_Snapshot__cache"] = None
+        del state["_Snapshot__build_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__build_lock = RLock()
+
+    def __drop_raw(self):
+        for objects in self.__objects.values():
+            for obj in objects:
+                obj.raw = DROPPED_RAW
+        self.raw_protos = ""
+        self.raw_gamemaster = []
+        self.gamemaster = GameMasterIndex()
+        self.raw_dropped = True
+
+    @property
+    def types(self) -> Sequence[Type]:
+        return self.__ensure("types")
+
+    @types.setter
+    def types(self, value: Sequence[Type]):
+        self.__objects["types"] = value
+
+    @property
+    def weather(self) -> Sequence[Weather]:
+        return self.__ensure("weather")
+
+    @weather.setter
+    def weather(self, value: Sequence[Weather]):
+        self.__objects["weather"] = value
+
+    @property
+    def moves(self) -> Sequence[Move]:
+        return self.__ensure("moves")
+
+    @moves.setter
+    def moves(self, value: Sequence[Move]):
+        self.__objects["moves"] = value
+
+    @property
+    def mons(self) -> Sequence[Pokemon]:
+        return self.__ensure("mons")
+
+    @mons.setter
+    def mons(self, value: Sequence[Pokemon]):
+        self.__objects["mons"] = value
+
+    def iter_objects(self, category: str, start: int = 0, **kwargs) -> Iterator[Tuple[int, Any]]:
+        """
+        Yields (position, object) of every object of a category that matches the query, starting
+        at position start. Objects are only compared as far as the results are consumed.
+        """
+        obj_list = self.__ensure(category)
+        index = self.__indexes.get(category)
+        if index is not None:
+            return index.iter_query(start, **kwargs)
+        return iter_scan(obj_list, start, **kwargs)
+
+    def __get_object(self, category: str, **kwargs) -> List[Any]:
+        obj_list = self.__ensure(category)
+        index = self.__indexes.get(category)
+        if index is not None:
+            return index.query(**kwargs)
+
+        # the category's builder is looking up objects it's still creating
+        return scan_objects(obj_list, **kwargs)
+
+    def get_mons(self, **kwargs) -> List[Pokemon]:
+        result = self.__get_object("mons", **kwargs)
+        return result
+
+    def get_types(self, **kwargs) -> List[Type]:
+        result = self.__get_object("types", **kwargs)
+        return result
+
+    def get_weather(self, **kwargs) -> List[Weather]:
+        result = self.__get_object("weather", **kwargs)
+        return result
+
+    def get_moves(self, **kwargs) -> List[Move]:
+        result = self.__get_object("moves", **kwargs)
+        return result
+
+    def get_evolution_family(self, mon: Pokemon) -> Tuple[Pokemon, ...]:
+        self.__ensure("mons")
+        return self.evolution_graph.family(mon)
+
+    def get_pre_evolutions(self, mon: Pokemon) -> List[Pokemon]:
+        self.__ensure("mons")
+        return self.evolution_graph.evolves_from(mon)
+
+    def get_rank_tables(self, cache_dir: Optional[str] = None, max_workers: Optional[int] = 0) -> RankTables:
+        """
+        PvP rank tables of all mons, built on first use
+        """
+        tables = self.__rank_tables
+        if tables is None:
+            mons = self.__ensure("mons")
+            with self.__build_lock:
+                tables = self.__rank_tables
+                if tables is None:
+                    with self.stats.stage("mons:pvp") as stage:
+                        tables = RankTables(mons, cache_dir, max_workers)
+                        stage.objects = len(tables.tables)
+                    self.__rank_tables = tables
+        return tables
+
+    def get_type_chart(self) -> TypeChart:
+        """
+        Type effectiveness of all types and of the type combinations of all mons, built on first use
+        """
+        chart = self.__type_chart
+        if chart is None:
+            types, mons = self.__ensure("types"), self.__ensure("mons")
+            with self.__build_lock:
+                chart = self.__type_chart
+                if chart is None:
+                    with self.stats.stage("types:chart") as stage:
+                        chart = TypeChart(types, mons)
+                        stage.objects = len(chart.combinations)
+                    self.__type_chart = chart
+        return chart
+
+    def get_moveset_table(self, weather: Optional[Weather] = None, max_workers: Optional[int] = 0) -> MovesetTable:
+        """
+        DPS, TDO and PvP stats of every moveset of all mons, built on first use for each weather
+        """
+        key = weather.proto.id if weather is not None else None
+        table = self.__moveset_tables.get(key)
+        if table is None:
+            mons = self.__ensure("mons")
+            with self.__build_lock:
+                table = self.__moveset_tables.get(key)
+                if table is None:
+                    with self.stats.stage("mons:movesets") as stage:
+                        table = MovesetTable(mons, weather, max_workers)
+                        stage.objects = len(table)
+                    self.__moveset_tables[key] = table
+        return table
+
+    def __search_index(self, category: str) -> SearchIndex:
+        index = self.__search_indexes.get(category)
+        if index is None:
+            objects = self.__ensure(category)
+            with self.__build_lock:
+                index = self.__search_indexes.get(category)
+                if index is None:
+                    with self.stats.stage(category + ":search") as stage:
+                        index = SearchIndex(objects)
+                        stage.objects = len(index.terms)
+                    self.__search_indexes[category] = index
+        return index
+
+    def search(self,
+               name: str,
+               language: Union[str, Language, None] = None,
+               kind: Optional[str] = None,
+               limit: int = 10) -> List[Any]:
+        if kind is None:
+            categories = list(BUILDERS)
+        elif kind in BUILDERS:
+            categories = [kind]
+        else:
+            raise InvalidQueryArgument(kind)
+        if language is not None:
+            language = Language.match(language).value
+
+        results = []
+        for category in categories:
+            # the best limit results of all categories are among the best limit of each
+            results += self.__search_index(category).search(name, language, limit)
+        # rank, typos and name length; the sort is stable, so equal matches keep their category's order
+        results.sort(key=lambda result: result[0][:3])
+        return [obj for _, obj in results[:limit]]
+
+    def get_column(self, category: str, key: str) -> array:
+        self.__ensure(category)
+        return self.__indexes[category].column(key)
+
+    def get_enum(self, enum: str, message: Optional[str] = None, remove: Optional[str] = None) -> EnumMatcher:
+        cache_key = str(message).lower() + ":" + enum.lower() + ":" + str(remove)
+        cached = self.__cached_enums.get(cache_key)
+        if cached:
+            final = cached
+        else:
+            entries = self.proto_index.get(enum, message)
+            if not entries:
+                return DefaultEnum(0)
+
+            final = {}
+            for k, v in entries.items():
+                if remove:
+                    k = k.replace(remove, "")
+                final[k] = v
+
+            final = EnumMatcher(enum, final)
+            self.__cached_enums[cache_key] = final
+
+        return final
+
+    def get_gamemaster(self, pattern: str, settings: Optional[str] = None) -> List[Tuple[str, Dict]]:
+        if self.raw_dropped:
+            raise RawDataDropped("The GameMaster")
+        if self.gamemaster_streamed and settings not in GAMEMASTER_SETTINGS:
+            raise RawDataDropped(f"GameMaster data other than {', '.join(GAMEMASTER_SETTINGS)}", streamed=True)
+        return self.gamemaster.get(pattern, settings)
@@ -1,12 +1,20 @@
-from typing import Union, Dict, List, Any, Tuple
+from array import array
+from typing import Union, Dict, List, Any, Tuple, Sequence, Iterable
 from enum import Enum
 
 from .icons import IconManager, IconSet
 from .custom_types import CustomEnum, QueryType
 from .gameobject import GameObject
 from .language import Language
+from .errors import InvalidQueryArgument
 
 
+# damage multipliers
+SUPER_EFFECTIVE = 1.6
+NOT_VERY_EFFECTIVE = 0.625
+# e.g. Normal attacks against Ghost Pokemon
+IMMUNE = 0.390625
+
 # typeid: #(effective_against, weak_against, resists, resisted_by)
 EFFECTIVENESSES = {
     0: (
@@ -31,7 +39,7 @@ EFFECTIVENESSES = {
         [10, 15, 3, 7], [2, 5, 9], [], []
     ),
     7: (
-        [12, 14, 17], [10, 2, 4, 8, 9, 18], [], [17]
+        [12, 14, 17], [10, 2, 4, 3, 8, 9, 18], [], []
     ),
     8: (
         [8, 14], [17], [1, 2], [1]
@@ -46,13 +54,13 @@ EFFECTIVENESSES = {
         [10, 5, 6], [11, 12, 16], [], []
     ),
     12: (
-        [11, 5, 6], [10, 12, 4, 3, 3, 7, 9, 18], [], []
+        [11, 5, 6], [10, 12, 4, 3, 7, 16, 9], [], []
     ),
     13: (
         [11, 3], [12, 13, 16], [], [5]
     ),
     14: (
-        [2, 4], [9, 14], [], []
+        [2, 4], [9, 14], [], [17]
     ),
     15: (
         [12, 5, 3, 16], [9, 10, 11, 15], [], []
@@ -61,28 +69,39 @@ EFFECTIVENESSES = {
         [16], [9], [], [18]
     ),
     17: (
-        [8, 14], [2, 17, 18], [7], []
+        [8, 14], [2, 17, 18], [14], []
     ),
     18: (
-        [2, 16, 17], [11, 4, 9], [16], []
+        [2, 16, 17], [10, 4, 9], [16], []
     )
 }
 
 
 class _BaseType(GameObject):
-    def __init_(self, icon_manager: IconManager, proto: Enum):
+    __slots__ = ()
+
+    def __init__(self, icon_manager: IconManager, proto: Enum):
         super().__init__(icon_manager)
 
         self.proto: CustomEnum = CustomEnum(proto)
 
     def get_base(self) -> Dict[str, Any]:
-        return vars(self.proto)
+        return self.proto.to_dict()
 
 
 class Type(_BaseType):
+    __slots__ = ("effective_against", "weak_against", "resists", "resisted_by")
+    QUERY_SCHEMA = {
+        "type": QueryType.customenum,
+        "name": QueryType.qlist,
+        "effective_against": QueryType.qlist,
+        "weak_against": QueryType.qlist,
+        "resists": QueryType.qlist,
+        "resisted_by": QueryType.qlist
+    }
+
     def __init__(self, icon_manager: IconManager, proto: Enum):
-        super().__init__(icon_manager)
-        self.proto: CustomEnum = CustomEnum(proto)
+        super().__init__(icon_manager, proto)
         self.names: Dict[str, str] = {}
 
         self.effective_against: List[_BaseType] = []
@@ -94,12 +113,12 @@ class Type(_BaseType):
 
     def make_query(self):
         self.query = {
-            "type": (QueryType.customenum, self.proto),
-            "name": (QueryType.qlist, self.names),
-            "effective_against": (QueryType.qlist, self.effective_against),
-            "weak_against": (QueryType.qlist, self.weak_against),
-            "resists": (QueryType.qlist, self.resists),
-            "resisted_by": (QueryType.qlist, self.resisted_by)
+            "type": self.proto,
+            "name": self.names,
+            "effective_against": self.effective_against,
+            "weak_against": self.weak_against,
+            "resists": self.resists,
+            "resisted_by": self.resisted_by
         }
 
     def get_full(self,
@@ -142,3 +161,101 @@ def _make_type_list(pogodata):
         montype.resisted_by += __get_type_ids(3)
 
         montype.make_query()
+
+
+class TypeChart:
+    """
+    Damage multipliers of attacking types against defending types and type combinations.
+
+    matrix: one row per attacking type id, one column per defending type id (matrix[attacker * size + defender])
+    combinations: multipliers of every attacking type against each type combination mons have,
+        keyed by their sorted type ids
+    """
+    def __init__(self, types: Sequence[Type], mons: Iterable[Any] = ()):
+        self.size = max((t.proto.id for t in types), default=0) + 1
+        self.ids: Dict[str, int] = {t.proto.tmpl: t.proto.id for t in types}
+        self.matrix = array("d", [1.0]) * (self.size * self.size)
+
+        for attacker in types:
+            row = attacker.proto.id * self.size
+            for defender in attacker.effective_against:
+                self.matrix[row + defender.proto.id] = SUPER_EFFECTIVE
+            for defender in attacker.weak_against:
+                self.matrix[row + defender.proto.id] = NOT_VERY_EFFECTIVE
+        # immunities are listed from both sides
+        for montype in types:
+            for defender in montype.resisted_by:
+                self.matrix[montype.proto.id * self.size + defender.proto.id] = IMMUNE
+            for attacker in montype.resists:
+                self.matrix[attacker.proto.id * self.size + montype.proto.id] = IMMUNE
+
+        self.combinations: Dict[Tuple[int, ...], array] = {}
+        for mon in mons:
+            self.defending(self.type_ids(mon))
+
+    def type_id(self, montype: Union[Type, int, str]) -> int:
+        """
+        montype: a Type, type id or template (e.g. "POKEMON_TYPE_FIRE")
+        """
+        if isinstance(montype, GameObject):
+            return montype.proto.id
+        try:
+            if isinstance(montype, str):
+                return self.ids[montype]
+            type_id = int(montype)
+        except (KeyError, ValueError, TypeError):
+            raise InvalidQueryArgument(montype)
+        if not 0 <= type_id < self.size:
+            raise InvalidQueryArgument(montype)
+        return type_id
+
+    def type_ids(self, defender: Any) -> Tuple[int, ...]:
+        """
+        Sorted type ids of a Pokemon, a type or a list of types
+        """
+        if hasattr(defender, "types"):
+            defender = defender.types
+        if isinstance(defender, (GameObject, int, str)):
+            return self.type_id(defender),
+        try:
+            montypes = list(defender)
+        except TypeError:
+            raise InvalidQueryArgument(defender)
+        return tuple(sorted(self.type_id(t) for t in montypes))
+
+    def defending(self, type_ids: Tuple[int, ...]) -> array:
+        """
+        Multipliers of every attacking type id against a type combination
+        """
+        row = self.combinations.get(type_ids)
+        if row is None:
+            row = array("d", [1.0]) * self.size
+            for defender in type_ids:
+                for attacker in range(self.size):
+                    row[attacker] *= self.matrix[attacker * self.size + defender]
+            self.combinations[type_ids] = row
+        return row
+
+    def multiplier(self, attack_type: Union[Type, int, str], defender: Any) -> float:
+        return self.defending(self.type_ids(defender))[self.type_id(attack_type)]
+
+    def matchup(self, attack_types: Sequence[Union[Type, int, str]], defenders: Sequence[Any]) -> array:
+        """
+        Multipliers of every attacking type against every defender, as one flat array with a row of
+        len(defenders) values per attacking type: result[attacker * len(defenders) + defender].
+
+        defenders: Pokemon, types or lists of types
+        """
+        attackers = [self.type_id(attack_type) for attack_type in attack_types]
+        every_type = attackers == list(range(self.size))
+        stride = len(defenders)
+        result = array("d", [1.0]) * (len(attackers) * stride)
+        columns: Dict[Tuple[int, ...], array] = {}
+        for position, defender in enumerate(defenders):
+            type_ids = self.type_ids(defender)
+            column = columns.get(type_ids)
+            if column is None:
+                row = self.defending(type_ids)
+                column = columns[type_ids] = row if every_type else array("d", map(row.__getitem__, attackers))
+            result[position::stride] = column
+        return result
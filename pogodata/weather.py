@@ -7,8 +7,17 @@ from .custom_types import CustomEnum, QueryType
 from .type import Type
 from .language import Language
 
+GAMEMASTER_SETTINGS = ("weatherAffinities",)
+
 
 class Weather(GameObject):
+    __slots__ = ("boosts",)
+    QUERY_SCHEMA = {
+        "weather": QueryType.customenum,
+        "name": QueryType.qlist,
+        "boosts": QueryType.qlist
+    }
+
     def __init__(self, icon_manager: IconManager, proto: Enum):
         super().__init__(icon_manager)
 
@@ -18,13 +27,13 @@ class Weather(GameObject):
 
     def make_query(self):
         self.query = {
-            "weather": (QueryType.customenum, self.proto),
-            "name": (QueryType.qlist, self.names),
-            "boosts": (QueryType.qlist, [t.proto.id for t in self.boosts])
+            "weather": self.proto,
+            "name": self.names,
+            "boosts": [t.proto.id for t in self.boosts]
         }
 
     def get_base(self) -> Dict[str, Any]:
-        return vars(self.proto)
+        return self.proto.to_dict()
 
     def get_full(self,
                  language: Union[str, Language] = Language.ENGLISH,
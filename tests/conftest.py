@@ -0,0 +1,23 @@
+import pytest
+import requests
+
+import upstream
+from pogodata import PogoData
+
+
+@pytest.fixture(scope="session", autouse=True)
+def offline():
+    """
+    Every request is answered from upstream.py, tests never download anything
+    """
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(requests, "get", upstream.get)
+        yield
+
+
+@pytest.fixture(scope="session")
+def data(offline):
+    """
+    One PogoData shared by all tests that only read from it
+    """
+    return PogoData()
@@ -0,0 +1,70 @@
+from functools import lru_cache
+
+import pytest
+
+from pogodata.cp import (calculate_cp, calculate_hp, calculate_batch, calculate_grid, find_stats, find_stats_batch,
+                         level_index, LEVELS, ALL_IVS)
+from pogodata.errors import InvalidLevel, InvalidQueryArgument
+
+MEWTWO = (300, 182, 214)
+SHUCKLE = (17, 396, 150)
+
+
+@lru_cache(maxsize=None)
+def _all_cps(base_stats):
+    # CP: every (level, IVs) with it, in level and IV order
+    cps = {}
+    for level in LEVELS:
+        for ivs in ALL_IVS:
+            cps.setdefault(calculate_cp(base_stats, level, ivs), []).append((level, ivs))
+    return cps
+
+
+def _brute_force(base_stats, cp, levels=LEVELS):
+    return [(level, ivs) for level, ivs in _all_cps(base_stats).get(cp, []) if level in levels]
+
+
+@pytest.mark.parametrize("base_stats", [MEWTWO, SHUCKLE])
+def test_find_stats_matches_brute_force(base_stats):
+    # the lowest, the highest and some CPs in between, including ones no IVs have
+    cps = {calculate_cp(base_stats, 1, (0, 0, 0)), calculate_cp(base_stats, 55, (15, 15, 15))}
+    cps |= set(range(min(cps), max(cps), 37))
+    cps |= {9, 10, 11, 12345}
+    for cp in sorted(cps):
+        assert find_stats(base_stats, cp) == _brute_force(base_stats, cp), cp
+
+
+def test_find_stats_level_range():
+    cp = calculate_cp(MEWTWO, 20, (15, 15, 15))
+    assert find_stats(MEWTWO, cp, 20, 25) == _brute_force(MEWTWO, cp, LEVELS[level_index(20):level_index(25) + 1])
+    assert (20, (15, 15, 15)) in find_stats(MEWTWO, cp, 20, 20)
+    assert find_stats_batch([(MEWTWO, cp, 20, 20), (MEWTWO, cp)]) == [find_stats(MEWTWO, cp, 20, 20),
+                                                                      find_stats(MEWTWO, cp)]
+
+
+def test_find_stats_invalid_arguments():
+    with pytest.raises(InvalidQueryArgument):
+        find_stats(MEWTWO, "high")
+    with pytest.raises(InvalidLevel):
+        find_stats(MEWTWO, 100, 0.5)
+
+
+def test_batches_match_scalar_functions():
+    levels = [1, 20.5, "40", 55]
+    entries = [(MEWTWO, level, ivs) for level in levels for ivs in ALL_IVS[::97]]
+    batch = calculate_batch(entries)
+    assert batch.cp.tolist() == [calculate_cp(*entry) for entry in entries]
+    assert batch.hp.tolist() == [calculate_hp(*entry) for entry in entries]
+
+    grid = calculate_grid(MEWTWO, levels, ALL_IVS[::97])
+    assert (grid.cp, grid.hp, grid.stat_product) == (batch.cp, batch.hp, batch.stat_product)
+
+
+@pytest.mark.parametrize("level", [0.5, 55.5, 20.25, "twenty", None, [20], {}, True, float("nan")])
+def test_invalid_levels(level):
+    with pytest.raises(InvalidLevel):
+        level_index(level)
+
+
+def test_levels():
+    assert [level_index(level) for level in (1, "1", 1.0, 40, "40.5", 55)] == [0, 0, 0, 78, 79, 108]
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from pogodata.cp import calculate_cp, calculate_hp, cp_multiplier, level_index, LEVELS, ALL_IVS
+from pogodata.errors import InvalidQueryArgument
+from pogodata.pvp import RankTables
+
+# a weak, a medium and a strong Pokemon
+BASE_STATS = [(101, 72, 128), (198, 189, 190), (300, 182, 214)]
+LEAGUES = {"great": 1500, "ultra": 2500}
+LEVEL_CAPS = (40, 50)
+
+
+def _brute_force(base_stats, max_cp, level_cap):
+    # (rank, level, stat product) of every IV combination, using the scalar functions
+    best = []
+    for ivs in ALL_IVS:
+        levels = [level for level in LEVELS[:level_index(level_cap) + 1]
+                  if calculate_cp(base_stats, level, ivs) <= max_cp]
+        if not levels:
+            best.append((None, 0))
+            continue
+        level = levels[-1]
+        hp = calculate_hp(base_stats, level, ivs)
+        product = (base_stats[0] + ivs[0]) * (base_stats[1] + ivs[1]) * cp_multiplier(level)**2 * hp
+        best.append((level, product))
+
+    products = sorted((product for level, product in best if level is not None), reverse=True)
+    ranks = {}
+    for place, product in enumerate(products, start=1):
+        ranks.setdefault(product, place)
+    return [(ranks[product] if level is not None else None, level, product) for level, product in best]
+
+
+@pytest.fixture(scope="module")
+def tables():
+    mons = [SimpleNamespace(base_stats=list(stats)) for stats in BASE_STATS]
+    return RankTables(mons, leagues=LEAGUES, level_caps=LEVEL_CAPS)
+
+
+@pytest.mark.parametrize("base_stats", BASE_STATS)
+@pytest.mark.parametrize("league", sorted(LEAGUES))
+@pytest.mark.parametrize("level_cap", LEVEL_CAPS)
+def test_ranks_match_brute_force(tables, base_stats, league, level_cap):
+    mon = SimpleNamespace(base_stats=list(base_stats))
+    expected = _brute_force(base_stats, LEAGUES[league], level_cap)
+    for ivs, (rank, level, product) in zip(ALL_IVS, expected):
+        result = tables.rank(mon, ivs, league, level_cap)
+        assert (result.rank, result.level) == (rank, level), ivs
+        if rank is not None:
+            assert result.stat_product == product
+            assert result.cp == calculate_cp(base_stats, level, ivs)
+    best = tables.rank(mon, ALL_IVS[[r for r, _, _ in expected].index(1)], league, level_cap)
+    assert best.percentage == 100
+
+
+def test_invalid_arguments(tables):
+    mon = SimpleNamespace(base_stats=list(BASE_STATS[0]))
+    for league, level_cap, ivs in [("master", 50, (0, 0, 0)), ("great", 45, (0, 0, 0)),
+                                   ("great", 50, (16, 0, 0)), ("great", 50, (0, 0))]:
+        with pytest.raises(InvalidQueryArgument):
+            tables.rank(mon, ivs, league, level_cap)
+    with pytest.raises(InvalidQueryArgument):
+        tables.rank(SimpleNamespace(base_stats=[1, 2, 3]), (0, 0, 0))
+
+
+def test_pogodata_ranks(data):
+    mon = next(mon for mon in data.mons if len(mon.base_stats) == 3)
+    rank = data.get_pvp_rank(mon, (0, 15, 15), "great", 50)
+    expected = _brute_force(tuple(mon.base_stats), 1500, 50)[ALL_IVS.index((0, 15, 15))]
+    assert (rank.rank, rank.level) == expected[:2]
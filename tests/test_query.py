@@ -0,0 +1,214 @@
+from enum import Enum
+
+import pytest
+
+from pogodata import PogoData
+from pogodata.custom_types import CustomEnum, EnumPredicate, ListPredicate, NumberPredicate
+from pogodata.errors import InvalidQueryArgument, NoORANDMixingInQList, QueryException
+from pogodata.pokemon import Pokemon
+
+CATEGORIES = ("types", "weather", "moves", "mons")
+
+
+def _arguments(objects):
+    """
+    Query arguments made from the objects' own query values, plus some that match nothing
+    """
+    arguments = {}
+    for obj in objects:
+        for key, value in obj.query.items():
+            values = arguments.setdefault(key, [])
+            if hasattr(value, "tmpl"):
+                values += [value.id, value.tmpl]
+            elif isinstance(value, (list, dict)):
+                values += [v for v in value if isinstance(v, (str, int))]
+            elif isinstance(value, bool):
+                values.append(value)
+            elif isinstance(value, (int, float)):
+                values += [value, f">{value}", f"<{value}", f">{value - 1}", f"<{value + 1}"]
+            elif isinstance(value, str):
+                values.append(value)
+    for values in arguments.values():
+        values += ["nope", 12345]
+    return arguments
+
+
+def _queries(objects):
+    arguments = _arguments(objects)
+    keys = sorted(arguments)
+    for key in keys:
+        for value in arguments[key]:
+            yield {key: value}
+    # a few combinations of two fields
+    for first, second in zip(keys, keys[1:]):
+        for value in arguments[first][:3]:
+            yield {first: value, second: arguments[second][0]}
+
+
+@pytest.mark.parametrize("category", CATEGORIES)
+def test_indexed_queries_match_comparing_every_object(data, category):
+    objects = getattr(data, category)
+    get = getattr(data, "get_" + category)
+    for kwargs in _queries(objects):
+        try:
+            expected = [obj for obj in objects if obj.compare(**kwargs)]
+        except Exception as error:
+            with pytest.raises(type(error)):
+                get(**kwargs)
+            continue
+        assert get(**kwargs) == expected, kwargs
+
+
+def test_ids_and_unknown_fields(data):
+    mon = data.mons[1]
+    assert data.get_mons(id=mon.id) == [m for m in data.mons if m.id == mon.id]
+    assert data.get_moves(id=0) == [m for m in data.moves if m.compare(id=0)]
+    # arguments that aren't query fields don't filter
+    assert data.get_mons(language="english") == list(data.mons)
+
+
+class _Types(Enum):
+    POKEMON_TYPE_NORMAL = 1
+    POKEMON_TYPE_GRASS = 12
+
+
+# How QueryType matched before queries were compiled into predicates, parsing the argument for every object
+
+def _old_customenum(original, to_match):
+    return original == to_match.id or str(original) == to_match.tmpl
+
+
+def _old_qlist(original, to_match):
+    if original.startswith(":"):
+        original = original[1:].replace("|", ",")
+    if "," in original and "|" in original:
+        raise NoORANDMixingInQList(original)
+    elif "," in original:
+        original_list = set(original.split(","))
+        return len([o for o in original_list if o in to_match]) >= len(original_list)
+    elif "|" in original:
+        return bool(set(original.split("|")) & set(to_match))
+    return original in to_match
+
+
+def _old_qint(original, to_match):
+    # the old qint parsed like this, but never returned its result
+    if to_match is None:
+        return False
+    try:
+        return int(original) == to_match
+    except ValueError:
+        pass
+    if original.startswith(">"):
+        return int(original[1:]) < to_match
+    if original.startswith("<"):
+        return int(original[1:]) > to_match
+    raise InvalidQueryArgument(original)
+
+
+@pytest.mark.parametrize("original", [1, 12, "1", "12", "POKEMON_TYPE_GRASS", "POKEMON_TYPE_FIRE", "nope"])
+def test_enum_predicate_matches_like_before(original):
+    values = [CustomEnum(montype) for montype in _Types] + [CustomEnum.default()]
+    predicate = EnumPredicate(original)
+    for value in values:
+        assert predicate.matches(value) == _old_customenum(original, value)
+
+
+@pytest.mark.parametrize("original", ["a", "d", "a,b", "a,d", "a|d", "d|e", ":a|b", ":a|d", "b,a,b"])
+def test_list_predicate_matches_like_before(original):
+    predicate = ListPredicate(original)
+    for value in (["a", "b", "c"], ["a"], [], {"a": "x", "d": "y"}):
+        assert predicate.matches(value) == _old_qlist(original, value)
+
+
+@pytest.mark.parametrize("original", ["a,b|c", "a|b,c"])
+def test_list_predicate_rejects_mixing_and_or(original):
+    with pytest.raises(NoORANDMixingInQList):
+        ListPredicate(original)
+
+
+@pytest.mark.parametrize("original", [5, "5", ">5", "<5", ">-1", "<0", "0"])
+def test_number_predicate_matches_like_before(original):
+    predicate = NumberPredicate(original, int)
+    for value in (-3, 0, 4, 5, 6, 100, None):
+        assert predicate.matches(value) == _old_qint(original, value)
+
+
+@pytest.mark.parametrize("original", ["heavy", ">", "<x", "5.5.5", None])
+def test_number_predicate_rejects_non_numbers(original):
+    with pytest.raises(InvalidQueryArgument):
+        NumberPredicate(original, int)
+
+
+@pytest.fixture
+def cached(offline):
+    """
+    A PogoData with a query cache, for tests that reload it
+    """
+    return PogoData(query_cache_size=8)
+
+
+def test_query_cache_hits(cached):
+    first = cached.get_mons(pokemon=1)
+    assert cached.get_mons(pokemon=1) == first
+    assert cached.query_cache.to_dict()["hits"] == 1
+    # argument order doesn't matter, but the argument type does
+    cached.get_moves(type=12, pve_power=">10")
+    cached.get_moves(pve_power=">10", type=12)
+    cached.get_mons(pokemon="1")
+    assert cached.query_cache.to_dict()["hits"] == 2
+
+
+def test_query_cache_is_cleared_on_reload(cached):
+    before = cached.get_mons(pokemon=1)
+    cached.get_mons(pokemon=1)
+    assert len(cached.query_cache) == 1
+
+    cached.reload()
+    assert len(cached.query_cache) == 0
+    after = cached.get_mons(pokemon=1)
+    assert after == [mon for mon in cached.mons if mon.compare(pokemon=1)]
+    # objects of the new snapshot, not the cached ones of the old one
+    assert all(new is not old for new, old in zip(after, before))
+    assert all(mon in cached.mons for mon in after)
+
+
+def test_query_cache_drops_results_from_before_a_reload(cached):
+    # a query that started before a reload can't put its result into the cleared cache
+    cache = cached.query_cache
+    generation = cache.generation
+    key = cache.key("mons", Pokemon.QUERY_SCHEMA, {"pokemon": 1})
+    cached.reload()
+    cache.put(key, [], generation)
+    assert cache.get(key) is None
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 100])
+def test_cursor_pages_add_up_to_the_full_result(data, limit):
+    expected = data.get_mons(tradable=True)
+    pages = [data.get_mons(limit=limit, tradable=True)]
+    while pages[-1].next_cursor is not None:
+        assert len(pages[-1]) == limit
+        pages.append(data.get_mons(limit=limit, cursor=pages[-1].next_cursor, tradable=True))
+        assert len(pages) <= len(expected) + 1
+    assert [mon for page in pages for mon in page] == expected
+
+
+def test_limit_and_offset(data):
+    expected = data.get_moves()
+    assert data.get_moves(limit=3, offset=2) == expected[2:5]
+    assert data.get_moves(limit=0) == []
+    assert data.get_moves(offset=len(expected)) == []
+    assert list(data.iter_moves()) == expected
+    # string arguments, as the server passes them
+    assert data.get_moves(limit="3", offset="2") == expected[2:5]
+
+
+@pytest.mark.parametrize("arguments", [
+    {"cursor": "abc"}, {"cursor": "-1"}, {"limit": "x"}, {"limit": -1}, {"offset": -2}, {"offset": None}
+])
+def test_invalid_pages(data, arguments):
+    # QueryExceptions are answered with HTTP 400 by the server
+    with pytest.raises(InvalidQueryArgument) as error:
+        data.get_mons(**arguments)
+    assert isinstance(error.value, QueryException)
@@ -0,0 +1,132 @@
+import string
+
+import pytest
+
+from pogodata.errors import InvalidQueryArgument
+from pogodata.search import SearchIndex, EXACT, EXACT_WORD, PREFIX, PREFIX_WORD, FUZZY, normalize, edit_distance
+
+
+class Named:
+    def __init__(self, **names):
+        self.names = names
+
+    def __repr__(self):
+        return f"<Named {self.names}>"
+
+
+PIKACHU = Named(english="Pikachu", german="Pikachu")
+RAICHU = Named(english="Raichu", german="Raichu")
+MR_MIME = Named(english="Mr. Mime", german="Pantimos")
+MIME_JR = Named(english="Mime Jr.", german="Pantimimi")
+FLABEBE = Named(english="Flabébé", german="Flabébé")
+PIDGEY = Named(english="Pidgey", german="Taubsi")
+PIDGEOT = Named(english="Pidgeot", german="Tauboss")
+EMPTY = Named(english="", german=None)
+OBJECTS = [PIKACHU, RAICHU, MR_MIME, MIME_JR, FLABEBE, PIDGEY, PIDGEOT, EMPTY]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(OBJECTS)
+
+
+def _search(index, name, **kwargs):
+    return [obj for _, obj in index.search(name, **kwargs)]
+
+
+def test_normalize():
+    assert normalize("Flabébé") == "flabebe"
+    assert normalize("Mr. Mime") == "mr mime"
+    assert normalize("  MIME   Jr. ") == "mime jr"
+    assert normalize("...") == ""
+
+
+def test_edit_distance():
+    assert edit_distance("pikachu", "pikachu", 2) == 0
+    assert edit_distance("pikachu", "pikachi", 2) == 1
+    # swapping neighbouring characters is one typo
+    assert edit_distance("pikachu", "pikahcu", 2) == 1
+    assert edit_distance("pikachu", "raichu", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+def test_exact_before_prefix_before_typos(index):
+    results = index.search("pidgey")
+    assert [obj for _, obj in results] == [PIDGEY, PIDGEOT]
+    assert [score[0] for score, _ in results] == [EXACT, FUZZY]
+    assert _search(index, "pidge") == [PIDGEY, PIDGEOT]
+    assert index.search("pidge")[0][0][0] == PREFIX
+
+
+def test_words_accents_and_punctuation(index):
+    assert index.search("mime")[0] == ((EXACT_WORD, 0, 7, 2), MR_MIME)
+    assert _search(index, "mime") == [MR_MIME, MIME_JR]
+    assert index.search("MIME")[1][0][0] == EXACT_WORD
+    assert [(score[0], obj) for score, obj in index.search("mim")] == [(PREFIX, MIME_JR), (PREFIX_WORD, MR_MIME)]
+    assert _search(index, "mr.mime") == [MR_MIME]
+    assert _search(index, "flabebe") == [FLABEBE]
+    assert index.search("jr")[0][0][0] == EXACT_WORD
+
+
+def test_typos(index):
+    assert _search(index, "pikachi") == [PIKACHU]
+    assert _search(index, "pikahcu") == [PIKACHU]
+    assert index.search("pikahcu")[0][0][:2] == (FUZZY, 1)
+    # 3 and 4 character queries allow one typo, shorter ones none
+    assert _search(index, "taubs") == [PIDGEY, PIDGEOT]
+    assert _search(index, "mmie") == [MR_MIME, MIME_JR]
+    assert _search(index, "rm") == []
+    assert _search(index, "xyzxyz") == []
+
+
+def test_languages(index):
+    assert _search(index, "pantimos") == [MR_MIME]
+    assert _search(index, "pantimos", language="english") == []
+    assert _search(index, "pika", language="german") == [PIKACHU]
+    assert _search(index, "ta", language="english") == []
+
+
+def test_every_object_once(index):
+    # Pikachu's names in both languages match, it's still only found once
+    assert _search(index, "pikachu") == [PIKACHU]
+    assert _search(index, "p") == [PIDGEY, PIKACHU, PIDGEOT, MR_MIME, MIME_JR]
+    assert len(set(map(id, _search(index, "i")))) == len(_search(index, "i"))
+
+
+def test_empty_queries(index):
+    assert index.search("") == []
+    assert index.search(" .. ") == []
+
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3])
+def test_limit_is_the_start_of_the_full_result(index, limit):
+    queries = list(string.ascii_lowercase) + ["pi", "mi", "ta", "pid", "pika", "mime", "pikachi"]
+    for query in queries:
+        assert index.search(query, limit=limit) == index.search(query)[:limit], query
+
+
+def test_short_queries_stop_at_the_limit():
+    # every name starts with "a", a limited search only looks at as many as it returns
+    class Counting(list):
+        reads = 0
+
+        def __getitem__(self, position):
+            Counting.reads += 1
+            return super().__getitem__(position)
+
+    objects = Counting(Named(english=f"a{i:04d}") for i in range(1000))
+    index = SearchIndex(objects)
+    Counting.reads = 0
+    assert len(index.search("a", limit=3)) == 3
+    assert Counting.reads == 3
+    assert index.search("a", limit=0) == []
+    assert Counting.reads == 3
+
+
+def test_pogodata_search(data):
+    assert [mon.proto.tmpl for mon in data.search("pikachu", kind="mons")][:1] == ["PIKACHU"]
+    assert data.search("pika", kind="mons", limit=0) == []
+    assert data.search("pika", kind="mons", limit="1") == data.search("pika", kind="mons")[:1]
+    for limit in ("x", -1, None):
+        with pytest.raises(InvalidQueryArgument):
+            data.search("pika", limit=limit)
@@ -0,0 +1,64 @@
+from itertools import combinations
+
+import pytest
+
+from pogodata.errors import InvalidQueryArgument
+from pogodata.type import EFFECTIVENESSES, SUPER_EFFECTIVE, NOT_VERY_EFFECTIVE, IMMUNE
+
+
+def _multiplier(attacker, defenders):
+    # straight from EFFECTIVENESSES, immunities are listed on both the attacking and the defending type
+    result = 1.0
+    effective_against, weak_against, _, resisted_by = EFFECTIVENESSES[attacker]
+    for defender in defenders:
+        if defender in resisted_by or attacker in EFFECTIVENESSES[defender][2]:
+            result *= IMMUNE
+        elif defender in effective_against:
+            result *= SUPER_EFFECTIVE
+        elif defender in weak_against:
+            result *= NOT_VERY_EFFECTIVE
+    return result
+
+
+def test_matchup_matches_effectivenesses(data):
+    types = {montype.proto.id: montype for montype in data.types}
+    ids = sorted(type_id for type_id in EFFECTIVENESSES if type_id)
+    defenders = [[type_id] for type_id in ids] + [list(pair) for pair in combinations(ids, 2)]
+    attackers = sorted(EFFECTIVENESSES)
+
+    result = data.matchup([types[attacker] for attacker in attackers],
+                          [[types[type_id] for type_id in defender] for defender in defenders])
+    assert len(result) == len(attackers) * len(defenders)
+    for row, attacker in enumerate(attackers):
+        for column, defender in enumerate(defenders):
+            expected = _multiplier(attacker, defender)
+            assert result[row * len(defenders) + column] == expected, (attacker, defender)
+
+
+def test_matchup_of_pokemon(data):
+    mons = [mon for mon in data.mons if mon.types]
+    result = data.matchup(range(len(EFFECTIVENESSES)), mons)
+    for attacker in range(len(EFFECTIVENESSES)):
+        for column, mon in enumerate(mons):
+            expected = _multiplier(attacker, [montype.proto.id for montype in mon.types])
+            assert result[attacker * len(mons) + column] == expected
+            assert data.get_type_chart().multiplier(attacker, mon) == expected
+
+
+def test_types_by_template_and_id(data):
+    chart = data.get_type_chart()
+    grass = next(montype for montype in data.types if montype.proto.tmpl == "POKEMON_TYPE_GRASS")
+    assert chart.type_id("POKEMON_TYPE_GRASS") == chart.type_id(grass) == chart.type_id(12) == 12
+    assert list(data.matchup(["POKEMON_TYPE_FIRE"], [grass, "POKEMON_TYPE_WATER"])) == [
+        SUPER_EFFECTIVE, NOT_VERY_EFFECTIVE
+    ]
+
+
+@pytest.mark.parametrize("montype", ["POKEMON_TYPE_SOUND", "fire", "12", None, 19, -1, 2.5j])
+def test_unknown_types(data, montype):
+    with pytest.raises(InvalidQueryArgument):
+        data.matchup([montype], data.types[:1])
+    with pytest.raises(InvalidQueryArgument):
+        data.matchup([1], [montype])
+    with pytest.raises(InvalidQueryArgument):
+        data.matchup([1], [[1, montype]])
@@ -0,0 +1,192 @@
+"""
+A small, made up version of everything pogodata downloads: protos, GameMaster, locales and icon trees.
+get() answers requests.get calls with it, see conftest.py
+"""
+import json
+
+TYPES = ["POKEMON_TYPE_NONE", "POKEMON_TYPE_NORMAL", "POKEMON_TYPE_FIGHTING", "POKEMON_TYPE_FLYING",
+         "POKEMON_TYPE_POISON", "POKEMON_TYPE_GROUND", "POKEMON_TYPE_ROCK", "POKEMON_TYPE_BUG",
+         "POKEMON_TYPE_GHOST", "POKEMON_TYPE_STEEL", "POKEMON_TYPE_FIRE", "POKEMON_TYPE_WATER",
+         "POKEMON_TYPE_GRASS", "POKEMON_TYPE_ELECTRIC", "POKEMON_TYPE_PSYCHIC", "POKEMON_TYPE_ICE",
+         "POKEMON_TYPE_DRAGON", "POKEMON_TYPE_DARK", "POKEMON_TYPE_FAIRY"]
+MONS = {0: "MISSINGNO", 1: "BULBASAUR", 2: "IVYSAUR", 3: "VENUSAUR", 19: "RATTATA", 25: "PIKACHU",
+        133: "EEVEE", 134: "VAPOREON", 135: "JOLTEON", 201: "UNOWN"}
+MOVES = {0: "MOVE_UNSET", 13: "WRAP", 14: "HYPER_BEAM", 59: "SEED_BOMB", 214: "VINE_WHIP_FAST",
+         221: "TACKLE_FAST", 209: "THUNDER_SHOCK_FAST", 35: "DISCHARGE", 230: "WATER_GUN_FAST"}
+FORMS = {0: "FORM_UNSET", 45: "RATTATA_NORMAL", 46: "RATTATA_ALOLA", 1: "UNOWN_A", 2: "UNOWN_B",
+         598: "PIKACHU_NORMAL"}
+
+
+def enum(name, values, indent=""):
+    lines = [f"{indent}enum {name} {{"]
+    for k, v in values.items():
+        lines.append(f"{indent}\t{v} = {k};")
+    lines.append(indent + "}")
+    return "\n".join(lines)
+
+
+PROTO = "\n".join([
+    'syntax = "proto3";',
+    "package POGOProtos.Rpc;",
+    "",
+    enum("Costume", {0: "UNSET", 1: "HOLIDAY_2016", 5: "PARTY_HAT"}),
+    "",
+    enum("Form", FORMS),
+    "",
+    enum("HoloPokemonClass", {0: "POKEMON_CLASS_NORMAL", 1: "POKEMON_CLASS_LEGENDARY", 2: "POKEMON_CLASS_MYTHIC"}),
+    "",
+    enum("HoloPokemonId", MONS),
+    "",
+    enum("HoloPokemonMove", MOVES),
+    "",
+    enum("HoloPokemonType", dict(enumerate(TYPES))),
+    "",
+    enum("HoloTemporaryEvolutionId", {0: "TEMP_EVOLUTION_UNSET", 1: "TEMP_EVOLUTION_MEGA"}),
+    "",
+    "message GameplayWeatherProto {",
+    enum("WeatherCondition", {0: "NONE", 1: "CLEAR", 2: "RAINY", 3: "PARTLY_CLOUDY"}, "\t"),
+    "",
+    "\tWeatherCondition gameplay_condition = 1;",
+    "}",
+    "",
+    "message OtherProto {",
+    enum("WeatherCondition", {0: "WRONG"}, "\t"),
+    "\tmessage Nested {",
+    enum("Deep", {0: "DEEP_UNSET", 7: "DEEP_SEVEN"}, "\t\t"),
+    "\t}",
+    "}",
+])
+
+
+def mon(dex, name, type1, stats, quick, charged, form=None, evos=(), extra=None):
+    tmpl = f"V{dex:04d}_POKEMON_{form or name}"
+    settings = {
+        "pokemonId": name,
+        "type": type1,
+        "stats": {"baseStamina": stats[2], "baseAttack": stats[0], "baseDefense": stats[1]},
+        "quickMoves": quick,
+        "cinematicMoves": charged,
+        "encounter": {"baseCaptureRate": 0.2, "baseFleeRate": 0.1, "bonusCandyCaptureReward": dex % 5},
+        "kmBuddyDistance": 3,
+        "isTradable": True,
+        "evolutionBranch": list(evos),
+    }
+    if form:
+        settings["form"] = form
+    if extra:
+        settings.update(extra)
+    return {"templateId": tmpl, "data": {"templateId": tmpl, "pokemonSettings": settings}}
+
+
+GM = [
+    {"templateId": "ITEM_POKE_BALL", "data": {"templateId": "ITEM_POKE_BALL", "itemSettings": {"itemId": "ITEM_POKE_BALL"}}},
+    {"templateId": "WEATHER_AFFINITY_CLEAR", "data": {"templateId": "WEATHER_AFFINITY_CLEAR", "weatherAffinities": {"weatherCondition": "CLEAR", "pokemonType": ["POKEMON_TYPE_GRASS", "POKEMON_TYPE_FIRE"]}}},
+    {"templateId": "WEATHER_AFFINITY_RAINY", "data": {"templateId": "WEATHER_AFFINITY_RAINY", "weatherAffinities": {"weatherCondition": "RAINY", "pokemonType": ["POKEMON_TYPE_WATER", "POKEMON_TYPE_ELECTRIC"]}}},
+]
+for mid, mname in MOVES.items():
+    if not mid:
+        continue
+    fast = mname.endswith("_FAST")
+    mtype = {"WRAP": "POKEMON_TYPE_NORMAL", "HYPER_BEAM": "POKEMON_TYPE_NORMAL", "SEED_BOMB": "POKEMON_TYPE_GRASS",
+             "VINE_WHIP_FAST": "POKEMON_TYPE_GRASS", "TACKLE_FAST": "POKEMON_TYPE_NORMAL",
+             "THUNDER_SHOCK_FAST": "POKEMON_TYPE_ELECTRIC", "DISCHARGE": "POKEMON_TYPE_ELECTRIC",
+             "WATER_GUN_FAST": "POKEMON_TYPE_WATER"}[mname]
+    t = f"V{mid:04d}_MOVE_{mname}"
+    GM.append({"templateId": t, "data": {"templateId": t, "moveSettings": {
+        "movementId": mname, "pokemonType": mtype, "power": 7 if fast else 60,
+        "durationMs": 600 if fast else 2600, "damageWindowStartMs": 300, "damageWindowEndMs": 500,
+        "energyDelta": 6 if fast else -50}}})
+    t = "COMBAT_" + t
+    GM.append({"templateId": t, "data": {"templateId": t, "combatMove": {
+        "uniqueId": mname, "type": mtype, "power": 5 if fast else 70, "energyDelta": 8 if fast else -45,
+        **({"durationTurns": 1} if fast else {})}}})
+
+GM += [
+    mon(1, "BULBASAUR", "POKEMON_TYPE_GRASS", (118, 111, 128), ["VINE_WHIP_FAST", "TACKLE_FAST"], ["SEED_BOMB"],
+        evos=[{"evolution": "IVYSAUR", "candyCost": 25}], extra={"type2": "POKEMON_TYPE_POISON"}),
+    mon(2, "IVYSAUR", "POKEMON_TYPE_GRASS", (151, 143, 155), ["VINE_WHIP_FAST"], ["SEED_BOMB"],
+        evos=[{"evolution": "VENUSAUR", "candyCost": 100}], extra={"type2": "POKEMON_TYPE_POISON"}),
+    mon(3, "VENUSAUR", "POKEMON_TYPE_GRASS", (198, 189, 190), ["VINE_WHIP_FAST"], ["SEED_BOMB", "HYPER_BEAM"],
+        evos=[{"temporaryEvolution": "TEMP_EVOLUTION_MEGA", "temporaryEvolutionEnergyCost": 200,
+               "temporaryEvolutionEnergyCostSubsequent": 40}],
+        extra={"type2": "POKEMON_TYPE_POISON", "eliteCinematicMove": ["HYPER_BEAM"],
+               "tempEvoOverrides": [{"tempEvoId": "TEMP_EVOLUTION_MEGA", "stats": {"baseStamina": 190, "baseAttack": 241, "baseDefense": 246},
+                                     "typeOverride1": "POKEMON_TYPE_GRASS", "typeOverride2": "POKEMON_TYPE_POISON"}]}),
+    mon(19, "RATTATA", "POKEMON_TYPE_NORMAL", (103, 70, 102), ["TACKLE_FAST"], ["HYPER_BEAM"]),
+    mon(19, "RATTATA", "POKEMON_TYPE_NORMAL", (103, 70, 102), ["TACKLE_FAST"], ["HYPER_BEAM"], form="RATTATA_NORMAL"),
+    mon(19, "RATTATA", "POKEMON_TYPE_DARK", (103, 70, 102), ["TACKLE_FAST"], ["HYPER_BEAM"], form="RATTATA_ALOLA"),
+    mon(25, "PIKACHU", "POKEMON_TYPE_ELECTRIC", (112, 96, 111), ["THUNDER_SHOCK_FAST"], ["DISCHARGE", "WRAP"]),
+    mon(133, "EEVEE", "POKEMON_TYPE_NORMAL", (104, 114, 146), ["TACKLE_FAST"], ["HYPER_BEAM"],
+        evos=[{"evolution": "VAPOREON", "candyCost": 25}, {"evolution": "JOLTEON", "candyCost": 25}]),
+    mon(134, "VAPOREON", "POKEMON_TYPE_WATER", (205, 161, 277), ["WATER_GUN_FAST"], ["HYPER_BEAM"]),
+    mon(135, "JOLTEON", "POKEMON_TYPE_ELECTRIC", (232, 182, 163), ["THUNDER_SHOCK_FAST"], ["DISCHARGE"]),
+    mon(201, "UNOWN", "POKEMON_TYPE_PSYCHIC", (136, 91, 134), ["TACKLE_FAST"], ["HYPER_BEAM"]),
+    {"templateId": "FORMS_V0019_POKEMON_RATTATA", "data": {"templateId": "FORMS_V0019_POKEMON_RATTATA", "formSettings": {
+        "pokemon": "RATTATA", "forms": [{"form": "RATTATA_NORMAL"}, {"form": "RATTATA_ALOLA", "assetBundleValue": 61}]}}},
+    {"templateId": "FORMS_V0201_POKEMON_UNOWN", "data": {"templateId": "FORMS_V0201_POKEMON_UNOWN", "formSettings": {
+        "pokemon": "UNOWN", "forms": [{"form": "UNOWN_A", "assetBundleValue": 11}, {"form": "UNOWN_B", "assetBundleValue": 12}]}}},
+    {"templateId": "SPAWN_V0001_POKEMON_BULBASAUR", "data": {"templateId": "SPAWN_V0001_POKEMON_BULBASAUR", "genderSettings": {
+        "pokemon": "BULBASAUR", "gender": {"malePercent": 0.875, "femalePercent": 0.125}}}},
+    {"templateId": "TEMPORARY_EVOLUTION_V0003_POKEMON_VENUSAUR", "data": {"templateId": "TEMPORARY_EVOLUTION_V0003_POKEMON_VENUSAUR", "temporaryEvolutionSettings": {
+        "pokemonId": "VENUSAUR", "temporaryEvolutions": [{"temporaryEvolutionId": "TEMP_EVOLUTION_MEGA", "assetBundleValue": 51}]}}},
+]
+
+LOCALE = "\n".join(
+    [f"RESOURCE ID: pokemon_name_{k:04d}\nTEXT: {v.title()}" for k, v in MONS.items()]
+    + ["RESOURCE ID: pokemon_name_0003_0001\nTEXT: Mega Venusaur"]
+    + [f"RESOURCE ID: move_name_{k:04d}\nTEXT: {v.replace('_FAST', '').replace('_', ' ').title()}" for k, v in MOVES.items()]
+    + [f"RESOURCE ID: {t.lower()}\nTEXT: {t.replace('POKEMON_TYPE_', '').title()}" for t in TYPES]
+    + ["RESOURCE ID: weather_clear\nTEXT: Clear", "RESOURCE ID: weather_rainy\nTEXT: Rain",
+       "RESOURCE ID: form_rattata_alola\nTEXT: Alola", "RESOURCE ID: form_unown_a\nTEXT: A",
+       "RESOURCE ID: pokemon_name_0201\nTEXT: Unówn"]
+)
+
+ICONS = ["Images/Pokemon/pokemon_icon_001_00.png", "Images/Pokemon/pokemon_icon_001_00_shiny.png",
+         "Images/Pokemon/pokemon_icon_003_00.png", "Images/Pokemon/pokemon_icon_003_51.png",
+         "Images/Pokemon/pokemon_icon_019_00.png", "Images/Pokemon/pokemon_icon_019_61.png",
+         "Images/Pokemon/pokemon_icon_025_00.png", "Images/Pokemon/pokemon_icon_025_01.png",
+         "Images/Pokemon/pokemon_icon_025_00_05.png", "Images/Pokemon/pokemon_icon_025_00_05_shiny.png",
+         "Images/Pokemon/pokemon_icon_133_00.png", "Images/Pokemon/pokemon_icon_201_11.png",
+         "Images/Pokemon/Addressable Assets/pm25.icon.png", "Images/Pokemon/Addressable Assets/pm25.g2.icon.png",
+         "Images/Types/grass.png"]
+
+SHA = {"commit": {"sha": "deadbeef"}}
+TREE = {"tree": [{"path": p} for p in ICONS]}
+
+
+class Response:
+    def __init__(self, body: str):
+        self.content = body.encode()
+        self.status_code = 200
+        self.headers = {}
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+    def __bool__(self):
+        return True
+
+
+def get(url, headers=None, stream=False, **kwargs):
+    if url.endswith("vbase.proto"):
+        return Response(PROTO)
+    if url.endswith("latest.json"):
+        return Response(json.dumps(GM))
+    if "Texts/" in url:
+        return Response(LOCALE if "APK" in url else "")
+    if "/branches/" in url:
+        return Response(json.dumps(SHA))
+    if "/git/trees/" in url:
+        return Response(json.dumps(TREE))
+    raise AssertionError(f"Unexpected request to {url}")